@@ -0,0 +1,132 @@
+"""
+Offline builders for the artifacts the API loads at startup.
+
+Run from the backend directory, e.g.:
+    python -m app.build_artifacts onnx
+    python -m app.build_artifacts faiss
+    python -m app.build_artifacts metadata
+"""
+import argparse
+import json
+import os
+import shutil
+import faiss
+import numpy as np
+from . import config
+
+
+def export_onnx_embedding_model(output_path: str = config.ONNX_EMBEDDING_MODEL_PATH):
+    """Exports the embedding transformer to ONNX and quantizes its weights to int8."""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    tokenizer = AutoTokenizer.from_pretrained(config.EMBEDDING_TOKENIZER_NAME)
+    model = AutoModel.from_pretrained(config.EMBEDDING_TOKENIZER_NAME).eval()
+
+    dummy = tokenizer(["example query"], return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    fp32_path = output_path.replace(".onnx", "-fp32.onnx")
+    print(f"Exporting {config.EMBEDDING_TOKENIZER_NAME} to {fp32_path}...")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(dummy[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=17,
+        )
+
+    print(f"Quantizing to int8 at {output_path}...")
+    quantize_dynamic(fp32_path, output_path, weight_type=QuantType.QInt8)
+    os.remove(fp32_path)
+    print("Done.")
+
+
+def build_ivfpq_index(vectors: np.ndarray, metric_type: int, nlist: int, m: int) -> faiss.Index:
+    """Trains an IVF-PQ index (8-bit codes) over `vectors` using the given metric."""
+    d = vectors.shape[1]
+    if metric_type == faiss.METRIC_INNER_PRODUCT:
+        quantizer = faiss.IndexFlatIP(d)
+    else:
+        quantizer = faiss.IndexFlatL2(d)
+    index = faiss.IndexIVFPQ(quantizer, d, nlist, m, 8, metric_type)
+    index.train(vectors)
+    index.add(vectors)
+    return index
+
+
+def build_hnsw_index(vectors: np.ndarray, metric_type: int) -> faiss.Index:
+    """Builds an HNSW graph index over `vectors`; no training required."""
+    index = faiss.IndexHNSWFlat(vectors.shape[1], config.FAISS_HNSW_M, metric_type)
+    index.hnsw.efConstruction = config.FAISS_HNSW_EF_CONSTRUCTION
+    index.add(vectors)
+    return index
+
+
+def rebuild_faiss_index(index_path: str = config.INDEX_PATH):
+    """
+    Rebuilds the flat index written by createFaiss.ipynb as a sub-linear one:
+    HNSW for small corpora, IVF-PQ once there are enough vectors to train it.
+    Vector ids (and therefore metadata positions) are preserved, and the
+    original index is kept next to it with a `.flat` suffix.
+    """
+    flat_index = faiss.read_index(index_path)
+    if not isinstance(flat_index, faiss.IndexFlat):
+        print(f"{index_path} is already a {type(flat_index).__name__}; nothing to do.")
+        return
+
+    vectors = flat_index.reconstruct_n(0, flat_index.ntotal)
+    if flat_index.ntotal >= config.FAISS_IVFPQ_MIN_VECTORS:
+        print(f"Training IVF-PQ index over {flat_index.ntotal} vectors...")
+        index = build_ivfpq_index(
+            vectors, flat_index.metric_type, config.FAISS_IVF_NLIST, config.FAISS_PQ_M)
+    else:
+        print(f"Building HNSW index over {flat_index.ntotal} vectors...")
+        index = build_hnsw_index(vectors, flat_index.metric_type)
+
+    shutil.copyfile(index_path, index_path + ".flat")
+    faiss.write_index(index, index_path)
+    print(f"Wrote {type(index).__name__} to {index_path}.")
+
+
+def convert_metadata_to_arrow(json_path: str = config.METADATA_PATH,
+                              arrow_path: str = config.METADATA_ARROW_PATH):
+    """
+    Converts the chunk metadata JSON written by createFaiss.ipynb to an Arrow
+    IPC file, which the API memory-maps and reads without copying.
+    """
+    import pyarrow as pa
+
+    with open(json_path, 'r', encoding='utf-8') as f:
+        metadata = json.load(f)
+    table = pa.Table.from_pylist(metadata)
+    with pa.OSFile(arrow_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    print(f"Wrote {len(metadata)} metadata rows to {arrow_path}.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("onnx", help="Export the int8 ONNX embedding model.")
+    subparsers.add_parser("faiss", help="Rebuild the flat FAISS index as HNSW/IVF-PQ.")
+    subparsers.add_parser("metadata", help="Convert the metadata JSON to a memory-mappable Arrow file.")
+    args = parser.parse_args()
+
+    if args.command == "onnx":
+        export_onnx_embedding_model()
+    elif args.command == "faiss":
+        rebuild_faiss_index()
+    elif args.command == "metadata":
+        convert_metadata_to_arrow()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,16 +6,54 @@ load_dotenv()
 
 print("Attempting to load environment variables...")
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 
-BACKEND_DIR = '/Users/dilshantharushika/Desktop/laptop agent/backend'
-INDEX_PATH = '/Users/dilshantharushika/Desktop/laptop agent/backend/laptops.index'
-METADATA_PATH = '/Users/dilshantharushika/Desktop/laptop agent/backend/laptops_metadata.json'
-DB_PATH = '/Users/dilshantharushika/Desktop/laptop agent/backend/laptops_dynamic.db'
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INDEX_PATH = os.path.join(BACKEND_DIR, 'laptops.index')
+# Written next to a large flat index the first time it is converted at load.
+IVFPQ_INDEX_PATH = os.path.join(BACKEND_DIR, 'laptops.ivfpq.index')
+METADATA_PATH = os.path.join(BACKEND_DIR, 'laptops_metadata.json')
+METADATA_ARROW_PATH = os.path.join(BACKEND_DIR, 'laptops_metadata.arrow')
+DB_PATH = os.path.join(BACKEND_DIR, 'laptops_dynamic.db')
+ONNX_EMBEDDING_MODEL_PATH = os.path.join(BACKEND_DIR, 'minilm-int8.onnx')
+# How often the API checks the artifact files for a rebuild to hot-swap; 0 disables it.
+ARTIFACT_RELOAD_INTERVAL_SECONDS = int(os.getenv("ARTIFACT_RELOAD_INTERVAL_SECONDS", "60"))
+DB_POOL_SIZE = 8
+DB_CACHED_STATEMENTS = 256
 
 
 EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+EMBEDDING_TOKENIZER_NAME = 'sentence-transformers/all-MiniLM-L6-v2'
+EMBEDDING_MAX_SEQ_LENGTH = 256
 GEMINI_MODEL_NAME = 'gemini-2.5-flash'
 
+FAISS_OMP_THREADS = 1
+FAISS_NPROBE = 8
+FAISS_IVF_NLIST = 64
+FAISS_PQ_M = 48
+FAISS_IVFPQ_MIN_VECTORS = 10000
+FAISS_HNSW_M = 32
+FAISS_HNSW_EF_CONSTRUCTION = 200
+FAISS_HNSW_EF_SEARCH = 64
+
+QUERY_CACHE_MAX_ENTRIES = 2048
+EMBED_BATCH_MAX_SIZE = 32
+EMBED_BATCH_MAX_WAIT_MS = 10
+EMBED_ENCODE_BATCH_SIZE = 64
+
+RETRIEVAL_CACHE_MAX_ENTRIES = 2048
+RETRIEVAL_CACHE_TTL_SECONDS = 60
+DYNAMIC_CACHE_MAX_ENTRIES = 4096
+DYNAMIC_CACHE_TTL_SECONDS = 30
+
+DIRECT_MIN_QUERY_CHARS = 3
+
+CATALOG_STREAM_PAGE_SIZE = 256
+
+SEMANTIC_CACHE_THRESHOLD = 0.95
+SEMANTIC_CACHE_MAX_ENTRIES = 1024
+SEMANTIC_CACHE_TTL_SECONDS = 300
+
 
 if GOOGLE_API_KEY:
     print("GOOGLE_API_KEY loaded successfully.")
@@ -0,0 +1,40 @@
+import threading
+import numpy as np
+import onnxruntime
+from transformers import AutoTokenizer
+
+
+class OnnxSentenceEncoder:
+    """
+    Drop-in replacement for SentenceTransformer.encode backed by an int8-quantized
+    ONNX export of the embedding model. Mean-pools the last hidden state over the
+    attention mask and L2-normalizes, matching all-MiniLM-L6-v2's own pipeline.
+    """
+
+    def __init__(self, model_path: str, tokenizer_name: str, max_seq_length: int = 256):
+        self.session = onnxruntime.InferenceSession(
+            model_path, providers=["CPUExecutionProvider"])
+        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+        self.max_seq_length = max_seq_length
+        self._input_names = [i.name for i in self.session.get_inputs()]
+        # Fast tokenizers are not safe to call from several threads at once.
+        self._tokenizer_lock = threading.Lock()
+
+    def encode(self, sentences, **kwargs) -> np.ndarray:
+        if isinstance(sentences, str):
+            sentences = [sentences]
+
+        with self._tokenizer_lock:
+            encoded = self.tokenizer(
+                sentences, padding=True, truncation=True,
+                max_length=self.max_seq_length, return_tensors="np")
+        feeds = {name: encoded[name].astype(np.int64)
+                 for name in self._input_names if name in encoded}
+
+        last_hidden_state = self.session.run(None, feeds)[0]
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        pooled = (last_hidden_state * mask).sum(axis=1) / \
+            np.clip(mask.sum(axis=1), 1e-9, None)
+
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
@@ -1,22 +1,60 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
+from contextlib import asynccontextmanager
+from functools import lru_cache
+import os
+import asyncio
+import logging
 import sqlite3
+import orjson
 from . import utils
 from . import config
 from . import rag_handler
 from .models import (
-    ChatQuery, ChatResponse, Laptop, PriceRecord, ReviewRecord, QARecord, ChatMessage
+    ChatQuery, ChatResponse, Laptop, CatalogVersion, PriceRecord, ReviewRecord, QARecord, ChatMessage
 )
 
 
+logging.basicConfig(
+    level=config.LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger(__name__)
+
 app_startup_success = utils.load_all_artifacts()
 
 
+async def _watch_artifacts(interval: float):
+    """Hot-swaps rebuilt index and metadata files; a cheap stat check while they are unchanged."""
+    global app_startup_success
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            app_startup_success = await asyncio.to_thread(utils.load_all_artifacts)
+        except Exception as e:
+            logger.exception("Artifact reload check failed: %s", e)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    utils.embed_batcher.start()
+    watcher = None
+    if config.ARTIFACT_RELOAD_INTERVAL_SECONDS > 0:
+        watcher = asyncio.create_task(
+            _watch_artifacts(config.ARTIFACT_RELOAD_INTERVAL_SECONDS))
+    yield
+    if watcher is not None:
+        watcher.cancel()
+    await utils.embed_batcher.stop()
+    await utils.close_db_pool()
+
+
 app = FastAPI(
     title="Laptop Insights API",
     description="API for querying laptop specs (static), dynamic data (price, reviews), and a RAG chatbot.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 
@@ -35,52 +73,85 @@ def read_root():
     return {"message": "Welcome to the Laptop Insights API. Visit /docs for documentation."}
 
 
-@app.get("/api/v1/laptops", response_model=List[Laptop], tags=["Catalog", "Search & Filtering"])
-def get_laptops(  # This is the CORRECT definition with filters
-    brand: Optional[str] = None,          # e.g., ?brand=Lenovo
-    min_rating: Optional[float] = None,   # e.g., ?min_rating=4.0
-    availability: Optional[str] = None    # e.g., ?availability=In Stock
-):
+@lru_cache(maxsize=None)
+def _build_laptop_query(has_brand: bool, has_min_rating: bool, has_availability: bool,
+                        paginated: bool = False, keyset: bool = False) -> str:
     """
-    Fetches the list of laptops from the catalog, optionally filtering by
-    brand, minimum average rating, and availability.
+    Returns the catalog SELECT for a combination of active filters. Reusing the
+    exact same text per combination lets sqlite3's statement cache skip re-parsing.
+    paginated adds LIMIT/OFFSET; keyset instead pages by primary key, taking the
+    last SKU seen and a page size after the filter parameters.
     """
-    laptops_data = []
     query = """
         SELECT sku, brand, model_name, currency, availability,
                shipping_eta, review_count, average_rating
         FROM Laptop
     """
     conditions = []
-    params = []
+    if has_brand:
+        conditions.append("LOWER(brand) = LOWER(?)")
+    if has_min_rating:
+        conditions.append("average_rating >= ?")
+    if has_availability:
+        conditions.append("LOWER(availability) = LOWER(?)")
+    if keyset:
+        conditions.append("sku > ?")
+
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    # A stable order keeps LIMIT/OFFSET pages from overlapping.
+    query += " ORDER BY sku"
+    if keyset:
+        query += " LIMIT ?"
+    elif paginated:
+        query += " LIMIT ? OFFSET ?"
+    return query
 
+
+def _laptop_filter_params(brand: Optional[str], min_rating: Optional[float],
+                          availability: Optional[str]) -> list:
+    """Validates the catalog filters and returns their bind parameters in query order."""
+    params = []
     if brand:
-        conditions.append("LOWER(brand) = LOWER(?)")
         params.append(brand)
     if min_rating is not None:
         if 0.0 <= min_rating <= 5.0:
-            conditions.append("average_rating >= ?")
             params.append(min_rating)
         else:
             raise HTTPException(
                 status_code=400, detail="min_rating must be between 0.0 and 5.0")
     if availability:
-        conditions.append("LOWER(availability) = LOWER(?)")
         params.append(availability)
+    return params
 
-    if conditions:
-        query += " WHERE " + " AND ".join(conditions)
 
-    print(f"Executing Query: {query}")  # For debugging
-    print(f"Parameters: {params}")     # For debugging
+@app.get("/api/v1/laptops", response_model=List[Laptop], tags=["Catalog", "Search & Filtering"])
+async def get_laptops(  # This is the CORRECT definition with filters
+    brand: Optional[str] = None,          # e.g., ?brand=Lenovo
+    min_rating: Optional[float] = None,   # e.g., ?min_rating=4.0
+    availability: Optional[str] = None,   # e.g., ?availability=In Stock
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Fetches a page of laptops from the catalog, optionally filtering by
+    brand, minimum average rating, and availability.
+    """
+    laptops_data = []
+    params = _laptop_filter_params(brand, min_rating, availability)
+    params += [limit, offset]
+
+    query = _build_laptop_query(
+        bool(brand), min_rating is not None, bool(availability), paginated=True)
+
+    logger.debug("Executing Query: %s params=%s", query, params)
 
     try:
-        with utils.get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, tuple(params))
-            rows = cursor.fetchall()
-            laptops_data = [Laptop(**row) for row in rows]
-            print(f"Found {len(laptops_data)} laptops matching filters.")
+        async with utils.get_db_connection() as conn:
+            cursor = await conn.execute(query, tuple(params))
+            rows = await cursor.fetchall()
+            laptops_data = [dict(row) for row in rows]
+            logger.debug("Found %d laptops matching filters.", len(laptops_data))
     except FileNotFoundError as e:
         raise HTTPException(
             status_code=500, detail=f"Database file not found: {e}")
@@ -94,26 +165,93 @@ def get_laptops(  # This is the CORRECT definition with filters
     return laptops_data
 
 
+async def _ensure_sku_exists(conn, sku: str, detail: str):
+    """
+    Raises a 404 with `detail` if the SKU is not in the Laptop catalog. Only
+    needed when a per-SKU query came back empty (unknown SKU vs. no data yet).
+    """
+    cursor = await conn.execute("SELECT 1 FROM Laptop WHERE sku = ?", (sku,))
+    if not await cursor.fetchone():
+        raise HTTPException(status_code=404, detail=detail)
+
+
+async def _stream_laptop_rows(query: str, params: tuple):
+    """
+    Yields the catalog rows as one JSON array, fetched in pages keyed on the last
+    SKU sent. The pooled connection is released before each page is sent, so slow
+    readers never hold it. A database error mid-stream is logged and re-raised,
+    aborting the response before the array is closed so clients see it as failed.
+    """
+    yield b"["
+    first = True
+    last_sku = ""
+    page_size = config.CATALOG_STREAM_PAGE_SIZE
+    while True:
+        try:
+            async with utils.get_db_connection() as conn:
+                cursor = await conn.execute(query, params + (last_sku, page_size))
+                rows = await cursor.fetchall()
+        except (FileNotFoundError, HTTPException, sqlite3.Error) as e:
+            logger.error("Catalog stream aborted after SKU %r: %s", last_sku, e)
+            raise
+        for row in rows:
+            yield (b"" if first else b",") + orjson.dumps(dict(row))
+            first = False
+        if len(rows) < page_size:
+            break
+        last_sku = rows[-1]["sku"]
+    yield b"]"
+
+
+@app.get("/api/v1/laptops/version", response_model=CatalogVersion, tags=["Catalog"])
+async def get_catalog_version():
+    """
+    Returns an opaque version string that changes whenever the catalog data may
+    have changed. Clients use it as a cache key instead of refetching on a timer.
+    """
+    return {"version": utils.db_version()}
+
+
+@app.get("/api/v1/laptops/stream", responses={200: {"model": List[Laptop]}},
+         tags=["Catalog", "Search & Filtering"])
+async def stream_laptops(
+    brand: Optional[str] = None,
+    min_rating: Optional[float] = None,
+    availability: Optional[str] = None
+):
+    """
+    Streams the full (optionally filtered) catalog as a JSON array without
+    materializing it, so memory stays flat regardless of catalog size. The
+    response is not validated against the documented schema.
+    """
+    params = _laptop_filter_params(brand, min_rating, availability)
+    query = _build_laptop_query(
+        bool(brand), min_rating is not None, bool(availability), keyset=True)
+    if not os.path.exists(config.DB_PATH):
+        raise HTTPException(
+            status_code=500, detail=f"Database file not found: {config.DB_PATH}")
+
+    return StreamingResponse(
+        _stream_laptop_rows(query, tuple(params)), media_type="application/json")
+
+
 @app.get("/api/v1/laptops/{sku}/price-history", response_model=List[PriceRecord], tags=["Dynamic Data"])
-def get_price_history(sku: str):
+async def get_price_history(sku: str):
     """Fetches the price history for a specific laptop SKU."""
     prices = []
     try:
-        with utils.get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT 1 FROM Laptop WHERE sku = ?", (sku,))
-            if not cursor.fetchone():
-                raise HTTPException(
-                    status_code=404, detail=f"Laptop SKU '{sku}' not found in catalog.")
-
-            cursor.execute(
+        async with utils.get_db_connection() as conn:
+            cursor = await conn.execute(
                 "SELECT id, laptop_sku, price, date, vendor_name, promo_badges FROM PriceHistory WHERE laptop_sku = ? ORDER BY date DESC",
                 (sku,)
             )
-            rows = cursor.fetchall()
-            prices = [PriceRecord(**row) for row in rows]
+            rows = await cursor.fetchall()
+            if not rows:
+                await _ensure_sku_exists(
+                    conn, sku, f"Laptop SKU '{sku}' not found in catalog.")
+            prices = [dict(row) for row in rows]
             if not prices:
-                print(f"No price history found for SKU: {sku}")
+                logger.debug("No price history found for SKU: %s", sku)
     except HTTPException:
         raise
     except FileNotFoundError as e:
@@ -129,23 +267,20 @@ def get_price_history(sku: str):
 
 
 @app.get("/api/v1/laptops/{sku}/reviews", response_model=List[ReviewRecord], tags=["Dynamic Data"])
-def get_reviews(sku: str):
+async def get_reviews(sku: str):
     """Fetches the reviews for a specific laptop SKU."""
     reviews = []
     try:
-        with utils.get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT 1 FROM Laptop WHERE sku = ?", (sku,))
-            if not cursor.fetchone():
-                raise HTTPException(
-                    status_code=404, detail=f"Laptop SKU '{sku}' not found.")
-
-            cursor.execute(
+        async with utils.get_db_connection() as conn:
+            cursor = await conn.execute(
                 "SELECT id, laptop_sku, rating, review_text, date, source FROM Review WHERE laptop_sku = ? ORDER BY date DESC",
                 (sku,)
             )
-            rows = cursor.fetchall()
-            reviews = [ReviewRecord(**row) for row in rows]
+            rows = await cursor.fetchall()
+            if not rows:
+                await _ensure_sku_exists(
+                    conn, sku, f"Laptop SKU '{sku}' not found.")
+            reviews = [dict(row) for row in rows]
     except HTTPException:
         raise
     except FileNotFoundError as e:
@@ -161,23 +296,20 @@ def get_reviews(sku: str):
 
 
 @app.get("/api/v1/laptops/{sku}/qanda", response_model=List[QARecord], tags=["Dynamic Data"])
-def get_qanda(sku: str):
+async def get_qanda(sku: str):
     """Fetches the Q&A for a specific laptop SKU."""
     qanda = []
     try:
-        with utils.get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT 1 FROM Laptop WHERE sku = ?", (sku,))
-            if not cursor.fetchone():
-                raise HTTPException(
-                    status_code=404, detail=f"Laptop SKU '{sku}' not found.")
-
-            cursor.execute(
+        async with utils.get_db_connection() as conn:
+            cursor = await conn.execute(
                 "SELECT id, laptop_sku, question_text, answer_text, date, source FROM QuestionAnswer WHERE laptop_sku = ? ORDER BY date DESC",
                 (sku,)
             )
-            rows = cursor.fetchall()
-            qanda = [QARecord(**row) for row in rows]
+            rows = await cursor.fetchall()
+            if not rows:
+                await _ensure_sku_exists(
+                    conn, sku, f"Laptop SKU '{sku}' not found.")
+            qanda = [dict(row) for row in rows]
     except HTTPException:
         raise
     except FileNotFoundError as e:
@@ -203,17 +335,40 @@ async def post_chat(request: ChatQuery):
 
     try:
 
-        result = rag_handler.get_rag_response(
+        result = await rag_handler.get_rag_response(
             query=request.query,
-            history=request.history
+            history=request.history,
+            refresh=request.refresh
         )
 
         return ChatResponse(**result)
 
     except Exception as e:
-        print(f"Error processing chat request: {e}")
+        logger.exception("Error processing chat request: %s", e)
 
         raise HTTPException(
             status_code=500,
             detail=f"An error occurred while processing your request: {e}"
         )
+
+
+@app.post("/api/v1/chat/stream", tags=["RAG Chat & Recommender"])
+async def post_chat_stream(request: ChatQuery):
+    """
+    Streams the RAG answer as Server-Sent Events: `{"delta": ...}` events while
+    Gemini generates, then a final `{"done": true, "retrieved_context": [...]}`.
+    """
+    if not app_startup_success:
+        raise HTTPException(
+            status_code=503,
+            detail="API failed to load necessary models or data files on startup. Check server logs."
+        )
+
+    return StreamingResponse(
+        rag_handler.stream_rag_response(
+            query=request.query,
+            history=request.history,
+            refresh=request.refresh
+        ),
+        media_type="text/event-stream"
+    )
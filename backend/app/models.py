@@ -17,6 +17,8 @@ class ChatQuery(BaseModel):
         {"role": "model",
             "content": "The ThinkPad E14 Gen 5 (Intel) offers various 13th Gen Intel Core processors..."}
     ])
+    # Bypass (and replace) any cached answer for this query.
+    refresh: bool = Field(False, example=False)
 
 
 class RetrievedChunk(BaseModel):
@@ -43,6 +45,10 @@ class Laptop(BaseModel):
     average_rating: Optional[float] = None
 
 
+class CatalogVersion(BaseModel):
+    version: str
+
+
 class PriceRecord(BaseModel):
     id: int
     laptop_sku: str
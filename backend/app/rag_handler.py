@@ -1,20 +1,245 @@
+import re
 import time
+import logging
+import json
+import asyncio
+import hashlib
+import cachetools
+from contextlib import contextmanager
 import numpy as np
 import google.generativeai as genai
+from . import config
 from . import utils
 from .models import RetrievedChunk, ChatMessage
 from typing import List, Optional
 
+logger = logging.getLogger(__name__)
 
-def get_rag_response(query: str, history: Optional[List[ChatMessage]] = None, k: int = 10):
+SYSTEM_INSTRUCTION = (
+    "You are an expert Q&A assistant and recommender for laptop specifications. "
+    "Base your answers *only* on the provided context (static specs, dynamic data) and conversation history. "
+    "Do not use outside knowledge. "
+    "Prioritize dynamic data (price, availability, rating) if relevant to the query. "
+    "When using static specs, cite the 'Citations' number (e.g., [cite: 123]). "
+    "When using dynamic data, state it clearly (e.g., 'The current price is...')."
+)
+
+SAFETY_SETTINGS = [
+    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
+]
+
+# Whole messages (after lowercasing and dropping punctuation) that are not questions.
+GREETINGS = frozenset({
+    "hi", "hello", "hey", "hiya", "yo", "hi there", "hello there", "hey there",
+    "good morning", "good afternoon", "good evening",
+})
+
+THANKS = frozenset({
+    "thanks", "thank you", "thanks a lot", "thank you very much", "thx", "ty",
+    "cheers", "ok thanks", "ok thank you", "great thanks", "perfect thanks",
+})
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _direct_response(query: str) -> Optional[dict]:
     """
-    Performs the full RAG pipeline using pre-loaded artifacts.
-    Returns a dictionary containing the LLM answer and retrieved context.
+    Cheap pre-retrieval gate. Returns a canned response for queries that are not
+    questions (an exact greeting or thanks, or next to empty), or None to run the
+    full pipeline. Anything else goes to retrieval, however short.
     """
-    start_time = time.time()
-    print(f"\nRAG Handler: Processing Query: '{query}' ")
-    if history:
-        print(f"  > Received {len(history)} messages in history.")
+    q = query.strip()
+    phrase = " ".join(_TOKEN_RE.findall(q.lower()))
+    if phrase in GREETINGS:
+        return {"llm_answer": "Hi! I can help with the Lenovo ThinkPad E14 Gen 5 and HP ProBook "
+                              "440 G11 / 450 G10 laptops: ask about specs, prices, reviews, "
+                              "availability, or for a recommendation.",
+                "retrieved_context": []}
+    if phrase in THANKS:
+        return {"llm_answer": "You're welcome! Let me know if you have any other questions "
+                              "about these laptops.",
+                "retrieved_context": []}
+
+    if len(q) < config.DIRECT_MIN_QUERY_CHARS:
+        return {"llm_answer": "Please ask a more specific question about the laptops, "
+                              "e.g. their specs, prices, reviews or availability.",
+                "retrieved_context": []}
+    return None
+
+
+def _generation_config():
+    return genai.types.GenerationConfig(
+        temperature=0.5,
+        max_output_tokens=2048,
+    )
+
+
+_retrieval_cache = cachetools.TTLCache(
+    maxsize=config.RETRIEVAL_CACHE_MAX_ENTRIES, ttl=config.RETRIEVAL_CACHE_TTL_SECONDS)
+
+_sem_cache_lock = asyncio.Lock()
+_sem_cache_vecs = None
+_sem_cache_entries = []
+# Exact layer over the same entries: normalized-prompt hash -> entry.
+_sem_cache_exact = {}
+
+
+def _prompt_key(query: str) -> bytes:
+    """Hashes the prompt after case and whitespace normalization."""
+    normalized = " ".join(query.lower().split())
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+
+
+def _drop_semantic_cache_rows(rows):
+    """Removes the given row positions from all cache structures (lock held)."""
+    global _sem_cache_vecs
+    for row in sorted(set(rows), reverse=True):
+        entry = _sem_cache_entries.pop(row)
+        if _sem_cache_exact.get(entry["prompt_key"]) is entry:
+            del _sem_cache_exact[entry["prompt_key"]]
+    _sem_cache_vecs = np.delete(_sem_cache_vecs, list(set(rows)), axis=0)
+
+
+def _entry_stale(entry, now: float) -> bool:
+    """True once an entry outlives its TTL or the dynamic data it quotes was rewritten."""
+    if entry["expires_at"] is not None and entry["expires_at"] <= now:
+        return True
+    return entry["data_epoch"] is not None and entry["data_epoch"] != utils.data_epoch
+
+
+def _entry_row(entry) -> int:
+    return next(i for i, e in enumerate(_sem_cache_entries) if e is entry)
+
+
+async def _exact_cache_lookup(prompt_key: bytes):
+    """Returns the cached response for a prompt identical after normalization, or None."""
+    async with _sem_cache_lock:
+        entry = _sem_cache_exact.get(prompt_key)
+        if entry is None:
+            return None
+        now = time.monotonic()
+        if _entry_stale(entry, now):
+            _drop_semantic_cache_rows([_entry_row(entry)])
+            return None
+        entry["last_used"] = now
+        return entry["result"]
+
+
+async def _semantic_cache_invalidate(query_vector: np.ndarray, prompt_key: bytes):
+    """Drops the cached answers a lookup for this prompt could return."""
+    async with _sem_cache_lock:
+        if not _sem_cache_entries:
+            return
+        rows = list(np.flatnonzero(
+            _sem_cache_vecs @ query_vector[0] >= config.SEMANTIC_CACHE_THRESHOLD))
+        if prompt_key in _sem_cache_exact:
+            rows.append(_entry_row(_sem_cache_exact[prompt_key]))
+        if rows:
+            _drop_semantic_cache_rows(rows)
+
+
+async def _semantic_cache_lookup(query_vector: np.ndarray):
+    """
+    Returns a previously generated response for a semantically equivalent query,
+    or None. Similarity is cosine over L2-normalized query embeddings.
+    """
+    async with _sem_cache_lock:
+        if not _sem_cache_entries:
+            return None
+
+        now = time.monotonic()
+        expired = [i for i, entry in enumerate(_sem_cache_entries) if _entry_stale(entry, now)]
+        if expired:
+            _drop_semantic_cache_rows(expired)
+            if not _sem_cache_entries:
+                return None
+
+        sims = _sem_cache_vecs @ query_vector[0]
+        best = int(np.argmax(sims))
+        if sims[best] < config.SEMANTIC_CACHE_THRESHOLD:
+            return None
+
+        entry = _sem_cache_entries[best]
+        entry["last_used"] = now
+        return entry["result"]
+
+
+async def _semantic_cache_store(query_vector: np.ndarray, prompt_key: bytes, result: dict,
+                                has_dynamic_data: bool, data_epoch: int):
+    """
+    Caches a generated response, evicting the least recently used entry when full.
+    data_epoch is utils.data_epoch as of when the response's dynamic data was read.
+    """
+    global _sem_cache_vecs
+
+    async with _sem_cache_lock:
+        now = time.monotonic()
+        if len(_sem_cache_entries) >= config.SEMANTIC_CACHE_MAX_ENTRIES:
+            lru = min(range(len(_sem_cache_entries)),
+                      key=lambda i: _sem_cache_entries[i]["last_used"])
+            _drop_semantic_cache_rows([lru])
+
+        # Answers quoting prices/availability must not outlive the data they quote.
+        expires_at = now + config.SEMANTIC_CACHE_TTL_SECONDS if has_dynamic_data else None
+        entry = {"result": result, "prompt_key": prompt_key,
+                 "expires_at": expires_at, "last_used": now,
+                 "data_epoch": data_epoch if has_dynamic_data else None}
+        _sem_cache_entries.append(entry)
+        _sem_cache_exact[prompt_key] = entry
+        if _sem_cache_vecs is None:
+            _sem_cache_vecs = query_vector.copy()
+        else:
+            _sem_cache_vecs = np.vstack([_sem_cache_vecs, query_vector])
+
+
+def _retrieval_cache_key(query_vector: np.ndarray, k: int) -> tuple:
+    """
+    Keys retrieval results by a hash of the float16-quantized query vector, so
+    vectors differing only in float noise share an entry. The DB write epoch is
+    part of the key, which drops every entry once dynamic data changes.
+    """
+    quantized = np.ascontiguousarray(query_vector, dtype=np.float16)
+    digest = hashlib.blake2b(quantized.view(np.uint8), digest_size=16).digest()
+    return (utils.data_epoch, k, digest)
+
+
+@contextmanager
+def timed(name: str, out: dict):
+    """Records the wall time of the block, in milliseconds, as out[name]."""
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        out[name] = (time.perf_counter_ns() - start) / 1e6
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+async def _prepare_rag_request(query: str, history: Optional[List[ChatMessage]], k: int,
+                               timings: dict, refresh: bool = False):
+    """
+    Runs retrieval and prompt construction (everything before generation).
+    Returns (early_result, prepared): early_result is a finished response when the
+    pipeline stops early (trivial query, error or cache hit), otherwise prepared holds the Gemini
+    messages plus what is needed to build and cache the final response.
+    Stage durations are recorded into timings. With refresh, cached answers for
+    the query are dropped instead of returned, and retrieval and dynamic data are
+    re-read rather than taken from their caches.
+    """
+    logger.debug("RAG Handler: Processing Query: %r (%d history messages)",
+                 query, len(history) if history else 0)
+
+    direct_result = _direct_response(query)
+    if direct_result is not None:
+        logger.debug("Answered directly; skipping retrieval and generation.")
+        return direct_result, None
 
     if not utils.artifacts_loaded or not all([
         utils.embedding_model_instance,
@@ -22,71 +247,77 @@ def get_rag_response(query: str, history: Optional[List[ChatMessage]] = None, k:
         utils.metadata_store_instance,
         utils.llm_model_instance
     ]):
-        print("Error: RAG components not loaded.")
+        logger.error("RAG components not loaded.")
+        return {"llm_answer": "Error: System components not loaded.", "retrieved_context": []}, None
 
-        return {"llm_answer": "Error: System components not loaded.", "retrieved_context": []}
+    # Follow-up questions depend on the history, so only standalone queries are cached.
+    prompt_key = None if history else _prompt_key(query)
+    if prompt_key is not None and not refresh:
+        cached_result = await _exact_cache_lookup(prompt_key)
+        if cached_result is not None:
+            logger.debug("Exact prompt cache hit; skipping embedding, retrieval and generation.")
+            return cached_result, None
 
-    print("Step 1: Retrieving static specs...")
-    start_retrieve_static = time.time()
     try:
 
-        query_vector = utils.embedding_model_instance.encode(
-            [query]).astype('float32')
-        distances, indices = utils.faiss_index_instance.search(query_vector, k)
-
-        retrieved_chunks = [RetrievedChunk(
-            **utils.metadata_store_instance[i]) for i in indices[0]]
+        with timed("embed", timings):
+            query_vector = await utils.embed_batcher.embed(query)
+
+        cache_vector = None if history else _normalize(query_vector)
+        if cache_vector is not None and refresh:
+            await _semantic_cache_invalidate(cache_vector, prompt_key)
+        elif cache_vector is not None:
+            cached_result = await _semantic_cache_lookup(cache_vector)
+            if cached_result is not None:
+                logger.debug("Semantic cache hit; skipping retrieval and generation.")
+                return cached_result, None
+
+        data_epoch = utils.data_epoch
+        retrieval_key = _retrieval_cache_key(query_vector, k)
+        cached_retrieval = None if refresh else _retrieval_cache.get(retrieval_key)
+        if cached_retrieval is None:
+            with timed("faiss", timings):
+                distances, indices, metadata = await asyncio.to_thread(
+                    utils.search_index, query, query_vector, k)
+
+            # Approximate indexes pad short result lists with id -1.
+            retrieved_chunks = [RetrievedChunk(**metadata[i]) for i in indices[0] if i >= 0]
     except Exception as e:
-        print(f"  Error during FAISS search: {e}")
-        return {"llm_answer": f"Error during search: {e}", "retrieved_context": []}
-    end_retrieve_static = time.time()
-    print(
-        f"  > Done ({len(retrieved_chunks)} chunks) in {end_retrieve_static - start_retrieve_static:.3f} seconds.")
-
-    print("Step 1b: Retrieving dynamic data...")
-    start_retrieve_dynamic = time.time()
-
-    mentioned_skus = sorted(
-        list(set(chunk.sku for chunk in retrieved_chunks if chunk.sku)))
-    print(f"  Identified SKUs: {mentioned_skus}")
+        logger.error("Error during FAISS search: %s", e)
+        return {"llm_answer": f"Error during search: {e}", "retrieved_context": []}, None
 
-    dynamic_context_dict = {}
-    if mentioned_skus:
-        for sku in mentioned_skus:
-
-            dynamic_context_dict[sku] = utils.get_dynamic_data_for_sku(sku)
+    dynamic_task = None
+    if cached_retrieval is not None:
+        logger.debug("Retrieval cache hit; reusing chunks and dynamic data.")
+        retrieved_chunks, dynamic_context_dict = cached_retrieval
     else:
-        print("  > No specific SKUs identified in static context.")
-    end_retrieve_dynamic = time.time()
-    print(
-        f"  > Done in {end_retrieve_dynamic - start_retrieve_dynamic:.3f} seconds.")
-
-    print("Step 2: Augmenting context...")
+        mentioned_skus = sorted(
+            list(set(chunk.sku for chunk in retrieved_chunks if chunk.sku)))
+        logger.debug("Retrieved %d chunks; identified SKUs: %s",
+                     len(retrieved_chunks), mentioned_skus)
+
+        dynamic_context_dict = {}
+        if mentioned_skus:
+            # Runs on the DB pool while the static context is assembled below.
+            dynamic_task = asyncio.create_task(
+                utils.get_dynamic_data_for_skus(mentioned_skus, refresh=refresh))
+        else:
+            logger.debug("No specific SKUs identified in static context.")
 
-    static_context_string = "\n STATIC SPECIFICATIONS CONTEXT \n"
+    static_parts: List[str] = ["\n STATIC SPECIFICATIONS CONTEXT \n"]
     if not retrieved_chunks:
-        static_context_string += "No relevant specifications found.\n"
+        static_parts.append("No relevant specifications found.\n")
     else:
         for i, chunk in enumerate(retrieved_chunks):
 
-            static_context_string += f"Context {i+1} (Source: {chunk.sku}, Section: {chunk.section_title}):\n"
-            static_context_string += f"  Content: {chunk.text}\n"
+            static_parts.append(
+                f"Context {i+1} (Source: {chunk.sku}, Section: {chunk.section_title}):\n")
+            static_parts.append(f"  Content: {chunk.text}\n")
             if chunk.citations:
-                static_context_string += f"  Citations: {chunk.citations}\n\n"
+                static_parts.append(f"  Citations: {chunk.citations}\n\n")
             else:
-                static_context_string += "\n"
-
-    dynamic_context_string = "\n--- CURRENT DYNAMIC DATA ---\n"
-    if not dynamic_context_dict:
-        dynamic_context_string += "No dynamic data retrieved.\n"
-    else:
-        for sku, data in dynamic_context_dict.items():
-            dynamic_context_string += f"For '{sku}':\n"
-            dynamic_context_string += f"  - Latest Price: {data.get('latest_price', 'N/A')}\n"
-            dynamic_context_string += f"  - Availability: {data.get('availability', 'N/A')}\n"
-            dynamic_context_string += f"  - Average Rating: {data.get('avg_rating', 'N/A')}\n\n"
-
-    combined_retrieved_context = static_context_string + dynamic_context_string
+                static_parts.append("\n")
+    static_context_string = "".join(static_parts)
 
     formatted_history = []
     if history:
@@ -95,14 +326,27 @@ def get_rag_response(query: str, history: Optional[List[ChatMessage]] = None, k:
             formatted_history.append(
                 {"role": msg.role, "parts": [{"text": msg.content}]})
 
-    system_instruction = (
-        "You are an expert Q&A assistant and recommender for laptop specifications. "
-        "Base your answers *only* on the provided context (static specs, dynamic data) and conversation history. "
-        "Do not use outside knowledge. "
-        "Prioritize dynamic data (price, availability, rating) if relevant to the query. "
-        "When using static specs, cite the 'Citations' number (e.g., [cite: 123]). "
-        "When using dynamic data, state it clearly (e.g., 'The current price is...')."
-    )
+    if dynamic_task is not None:
+        with timed("dynamic_wait", timings):
+            dynamic_context_dict = await dynamic_task
+    if cached_retrieval is None:
+        _retrieval_cache[retrieval_key] = (retrieved_chunks, dynamic_context_dict)
+
+    dynamic_parts: List[str] = ["\n--- CURRENT DYNAMIC DATA ---\n"]
+    if not dynamic_context_dict:
+        dynamic_parts.append("No dynamic data retrieved.\n")
+    else:
+        for sku, data in dynamic_context_dict.items():
+            dynamic_parts.append(f"For '{sku}':\n")
+            dynamic_parts.append(
+                f"  - Latest Price: {data.get('latest_price', 'N/A')}\n")
+            dynamic_parts.append(
+                f"  - Availability: {data.get('availability', 'N/A')}\n")
+            dynamic_parts.append(
+                f"  - Average Rating: {data.get('avg_rating', 'N/A')}\n\n")
+    dynamic_context_string = "".join(dynamic_parts)
+
+    combined_retrieved_context = static_context_string + dynamic_context_string
 
     gemini_messages = []
 
@@ -111,7 +355,7 @@ def get_rag_response(query: str, history: Optional[List[ChatMessage]] = None, k:
     gemini_messages.append({
         "role": "user",
         "parts": [{
-            "text": f"""SYSTEM INSTRUCTIONS: {system_instruction}
+            "text": f"""SYSTEM INSTRUCTIONS: {SYSTEM_INSTRUCTION}
 
                 CONTEXT FOR YOUR RESPONSE:
                 {combined_retrieved_context}
@@ -121,49 +365,139 @@ def get_rag_response(query: str, history: Optional[List[ChatMessage]] = None, k:
         }]
     })
 
-    print("Step 3: Generating answer using Google Gemini...")
+    return None, {
+        "messages": gemini_messages,
+        "retrieved_chunks": retrieved_chunks,
+        "has_dynamic_data": bool(dynamic_context_dict),
+        "data_epoch": data_epoch,
+        "cache_vector": cache_vector,
+        "prompt_key": prompt_key,
+    }
+
+
+async def get_rag_response(query: str, history: Optional[List[ChatMessage]] = None, k: int = 10,
+                           refresh: bool = False):
+    """
+    Performs the full RAG pipeline using pre-loaded artifacts.
+    Returns a dictionary containing the LLM answer and retrieved context.
+    """
+    timings = {}
+    start = time.perf_counter_ns()
+    early_result, prepared = await _prepare_rag_request(query, history, k, timings, refresh)
+    if early_result is not None:
+        timings["total"] = (time.perf_counter_ns() - start) / 1e6
+        logger.info("rag timings=%s", timings)
+        return early_result
+
     llm_answer = "Error: LLM generation failed."
-    start_generate = time.time()
+    generation_succeeded = False
     try:
-        generation_config = genai.types.GenerationConfig(
-            temperature=0.5,
-            max_output_tokens=2048,
-        )
-
-        safety_settings = [
-            {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-            {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-            {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-            {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
-        ]
-
-        response = utils.llm_model_instance.generate_content(
-            gemini_messages,
-            generation_config=generation_config,
-            safety_settings=safety_settings
-        )
+        with timed("generate", timings):
+            response = await utils.llm_model_instance.generate_content_async(
+                prepared["messages"],
+                generation_config=_generation_config(),
+                safety_settings=SAFETY_SETTINGS
+            )
 
         if not response.parts and hasattr(response, 'prompt_feedback') and response.prompt_feedback.block_reason:
             reason = response.prompt_feedback.block_reason
             llm_answer = f"Error: Content generation blocked by safety filters. Reason: {reason}"
-            print(f"  > Generation Blocked: {reason}")
+            logger.warning("Generation Blocked: %s", reason)
         elif not response.parts:
             llm_answer = "Error: LLM response was empty or blocked for an unknown reason."
-            print("  > Generation Error: Empty or unknown block.")
+            logger.warning("Generation Error: Empty or unknown block.")
         else:
 
             llm_answer = response.text.strip()
-            end_generate = time.time()
-            print(f"  > Done in {end_generate - start_generate:.3f} seconds.")
+            generation_succeeded = True
 
     except Exception as e:
-        end_generate = time.time()
-        print(
-            f"  > Generation failed after {end_generate - start_generate:.3f} seconds.")
-        print(f"  Error during Google Gemini API call: {e}")
+        logger.error("Error during Google Gemini API call: %s", e)
         llm_answer = f"Error during LLM call: {e}"
 
-    total_time = time.time() - start_time
-    print(f"--- RAG Handler: Query processed in {total_time:.3f} seconds ---")
+    timings["total"] = (time.perf_counter_ns() - start) / 1e6
+    logger.info("rag timings=%s", timings)
+
+    result = {"llm_answer": llm_answer,
+              "retrieved_context": prepared["retrieved_chunks"]}
+    if prepared["cache_vector"] is not None and generation_succeeded:
+        await _semantic_cache_store(
+            prepared["cache_vector"], prepared["prompt_key"], result,
+            prepared["has_dynamic_data"], prepared["data_epoch"])
+
+    return result
+
+
+def _sse_event(payload: dict) -> str:
+    return f"data: {json.dumps(payload)}\n\n"
 
-    return {"llm_answer": llm_answer, "retrieved_context": retrieved_chunks}
+
+def _final_sse_event(retrieved_chunks: List[RetrievedChunk]) -> str:
+    return _sse_event({
+        "done": True,
+        "retrieved_context": [chunk.model_dump() for chunk in retrieved_chunks],
+    })
+
+
+async def stream_rag_response(query: str, history: Optional[List[ChatMessage]] = None, k: int = 10,
+                              refresh: bool = False):
+    """
+    Streaming variant of get_rag_response, yielding Server-Sent Events.
+    Each `{"delta": ...}` event carries a piece of the answer as Gemini produces
+    it; a final `{"done": true, "retrieved_context": [...]}` event closes the stream.
+    """
+    timings = {}
+    start = time.perf_counter_ns()
+    early_result, prepared = await _prepare_rag_request(query, history, k, timings, refresh)
+    if early_result is not None:
+        timings["total"] = (time.perf_counter_ns() - start) / 1e6
+        logger.info("rag timings=%s", timings)
+        yield _sse_event({"delta": early_result["llm_answer"]})
+        yield _final_sse_event(early_result["retrieved_context"])
+        return
+
+    answer_parts = []
+    try:
+        generate_start = time.perf_counter_ns()
+        response = await utils.llm_model_instance.generate_content_async(
+            prepared["messages"],
+            generation_config=_generation_config(),
+            safety_settings=SAFETY_SETTINGS,
+            stream=True
+        )
+        async for chunk in response:
+            if not chunk.parts:
+                continue
+            answer_parts.append(chunk.text)
+            yield _sse_event({"delta": chunk.text})
+
+        if not answer_parts:
+            reason = getattr(getattr(response, 'prompt_feedback', None), 'block_reason', None)
+            if reason:
+                message = f"Error: Content generation blocked by safety filters. Reason: {reason}"
+                logger.warning("Generation Blocked: %s", reason)
+            else:
+                message = "Error: LLM response was empty or blocked for an unknown reason."
+                logger.warning("Generation Error: Empty or unknown block.")
+            yield _sse_event({"delta": message})
+
+    except Exception as e:
+        logger.error("Error during Google Gemini API call: %s", e)
+        answer_parts = []
+        yield _sse_event({"delta": f"Error during LLM call: {e}"})
+
+    end = time.perf_counter_ns()
+    timings["generate"] = (end - generate_start) / 1e6
+    timings["total"] = (end - start) / 1e6
+    logger.info("rag timings=%s", timings)
+
+    # Store before the final event: a client that disconnects once it has the
+    # answer would otherwise cancel the generator before the store runs.
+    if prepared["cache_vector"] is not None and answer_parts:
+        result = {"llm_answer": "".join(answer_parts).strip(),
+                  "retrieved_context": prepared["retrieved_chunks"]}
+        await _semantic_cache_store(
+            prepared["cache_vector"], prepared["prompt_key"], result,
+            prepared["has_dynamic_data"], prepared["data_epoch"])
+
+    yield _final_sse_event(prepared["retrieved_chunks"])
@@ -1,72 +1,418 @@
 import streamlit as st
-import requests
+import re
+import time
+import httpx
+import ijson
 import pandas as pd
 from datetime import datetime
 import plotly.express as px
-import json
+import plotly.graph_objects as go
+import orjson
+from types import MappingProxyType
 from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
 
 
 API_BASE_URL = "http://localhost:8000/api/v1"
 
+# Bar charts render as SVG; past this many bars the volume chart is bucketed by quarter.
+MAX_VOLUME_BARS = 500
+
+_CITE_RE = re.compile(r'\[(\d+(?:,\s*\d+)*)\]')
+
+PDF_MAP = MappingProxyType({
+    "ThinkPad E14 Gen 5 (Intel)": "https://psref.lenovo.com/syspool/Sys/PDF/ThinkPad/ThinkPad_E14_Gen_5_Intel/ThinkPad_E14_Gen_5_Intel_Spec.PDF",
+    "Lenovo ThinkPad E14 Gen 5 (AMD)": "https://psref.lenovo.com/syspool/Sys/PDF/ThinkPad/ThinkPad_E14_Gen_5_AMD/ThinkPad_E14_Gen_5_AMD_Spec.pdf",
+    "HP ProBook 450 G10 — Datasheet": "https://h20195.www2.hp.com/v2/GetPDF.aspx/c08504822.pdf",
+    "HP ProBook 440 14 inch G11 Notebook PC": "https://h20195.www2.hp.com/v2/getpdf.aspx/c08947328.pdf"
+})
+
+
+class _StatusRetryTransport(httpx.HTTPTransport):
+    """Retries idempotent requests answered with a gateway error, with exponential backoff."""
+
+    RETRY_STATUSES = frozenset({502, 503, 504})
+    RETRY_METHODS = frozenset({"GET", "HEAD"})
+
+    def __init__(self, *args, status_retries=3, backoff_factor=0.2, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.status_retries = status_retries
+        self.backoff_factor = backoff_factor
+
+    def handle_request(self, request):
+        for attempt in range(self.status_retries + 1):
+            response = super().handle_request(request)
+            if (attempt == self.status_retries
+                    or request.method not in self.RETRY_METHODS
+                    or response.status_code not in self.RETRY_STATUSES):
+                return response
+            response.close()
+            time.sleep(self.backoff_factor * (2 ** attempt))
+
+
+@st.cache_resource
+def get_http_client():
+    """
+    HTTP/2-capable client shared across reruns, so backend calls reuse (and,
+    behind an HTTP/2 proxy, multiplex over) the same connections.
+    """
+    # Pool and HTTP/2 settings live on the transport, which retries failed connects
+    # and GETs answered with 502/503/504.
+    transport = _StatusRetryTransport(
+        http2=True, retries=3,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=40))
+    return httpx.Client(transport=transport, timeout=httpx.Timeout(10.0),
+                        headers={"Accept": "application/json"})
+
 
 def fetch_api_data(endpoint):
     """Fetches data from a GET endpoint of the backend API."""
     url = f"{API_BASE_URL}/{endpoint}"
 
     try:
-        response = requests.get(url, timeout=10)
+        response = get_http_client().get(url)
         response.raise_for_status()
-        return response.json()
-    except requests.exceptions.Timeout:
+        return orjson.loads(response.content)
+    except httpx.TimeoutException:
         st.error(f"Error: Request timed out fetching data from {endpoint}.")
         return None
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         st.error(
             f"Error: Could not connect to the API backend at {API_BASE_URL}. Is it running?")
         return None
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         st.error(f"Error fetching data from {endpoint}: {e}")
         return None
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
 
         st.error(
             f"Error decoding JSON response from {endpoint}. Response text: {response.text[:200]}...")
         return None
 
 
-def post_chat_query(query, history):
-    """Sends a query and history to the chat endpoint."""
+def iter_api_items(endpoint):
+    """
+    Streams the items of a GET endpoint returning a JSON array, parsing them
+    incrementally instead of buffering the whole body. Errors are reported and
+    re-raised, so callers never cache a truncated list.
+    """
+    url = f"{API_BASE_URL}/{endpoint}"
+
+    try:
+        with get_http_client().stream("GET", url) as response:
+            response.raise_for_status()
+            items = ijson.sendable_list()
+            parser = ijson.items_coro(items, 'item', use_float=True)
+            for chunk in response.iter_bytes():
+                parser.send(chunk)
+                yield from items
+                del items[:]
+            parser.close()
+            yield from items
+    except httpx.TimeoutException:
+        st.error(f"Error: Request timed out fetching data from {endpoint}.")
+        raise
+    except httpx.ConnectError:
+        st.error(
+            f"Error: Could not connect to the API backend at {API_BASE_URL}. Is it running?")
+        raise
+    except httpx.HTTPError as e:
+        st.error(f"Error fetching data from {endpoint}: {e}")
+        raise
+    except ijson.JSONError as e:
+        st.error(f"Error decoding JSON response from {endpoint}: {e}")
+        raise
+
+
+def fetch_api_dataframe(endpoint):
+    """Builds a DataFrame straight from a streamed JSON array, without an intermediate list."""
+    return pd.DataFrame.from_records(iter_api_items(endpoint))
+
+
+@st.cache_resource
+def get_fetch_pool():
+    """Worker threads shared across reruns for fanning out GETs over the shared client."""
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="api-fetch")
+
+
+def _get_json(endpoint):
+    response = get_http_client().get(f"{API_BASE_URL}/{endpoint}")
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+
+def fetch_many_api_data(endpoints):
+    """
+    Fetches several GET endpoints concurrently over the shared client and returns
+    one result per endpoint. Every failure is reported, then the first one is
+    raised, so cached callers never memoize a failed fetch.
+    """
+    futures = [get_fetch_pool().submit(_get_json, endpoint) for endpoint in endpoints]
+    results = []
+    error = None
+    for endpoint, future in zip(endpoints, futures):
+        try:
+            results.append(future.result())
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
+            st.error(f"Error fetching data from {endpoint}: {e}")
+            error = error or e
+    if error is not None:
+        raise error
+    return results
+
+
+def post_chat_query(query, history, refresh=False):
+    """Sends a query and history to the chat endpoint. refresh bypasses cached answers."""
     url = f"{API_BASE_URL}/chat"
-    payload = {"query": query, "history": history}
+    payload = {"query": query, "history": history, "refresh": refresh}
 
     try:
 
-        response = requests.post(url, json=payload, timeout=30)
+        response = get_http_client().post(
+            url, content=orjson.dumps(payload),
+            headers={"Content-Type": "application/json"}, timeout=30)
         response.raise_for_status()
-        return response.json()
-    except requests.exceptions.Timeout:
+        return orjson.loads(response.content)
+    except httpx.TimeoutException:
         st.error(f"Error: Chat request timed out.")
         return None
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         st.error(
             f"Error: Could not connect to the API backend at {API_BASE_URL}. Is it running?")
         return None
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPStatusError as e:
         st.error(f"Error sending chat message: {e}")
 
         try:
-            error_detail = response.json().get('detail', str(e))
+            error_detail = orjson.loads(e.response.content).get('detail', str(e))
             st.error(f"API Error Detail: {error_detail}")
-        except:
+        except orjson.JSONDecodeError:
             pass
         return None
-    except json.JSONDecodeError:
+    except httpx.HTTPError as e:
+        st.error(f"Error sending chat message: {e}")
+        return None
+    except orjson.JSONDecodeError:
         st.error(
             f"Error decoding chat JSON response. Response text: {response.text[:200]}...")
         return None
 
 
+@st.cache_data(ttl=60)
+def _catalog_version():
+    """The backend's catalog version; a failed fetch raises, so it is never cached."""
+    version = fetch_api_data("laptops/version")
+    if version is None:
+        raise ConnectionError("Catalog version could not be fetched.")
+    return version["version"]
+
+
+def get_catalog_version():
+    try:
+        return _catalog_version()
+    except ConnectionError:
+        return None
+
+
+@st.cache_data(ttl=300, max_entries=2)
+def _laptops_snapshot(version):
+    """Brands and SKUs from one catalog fetch; a failed fetch raises, so it is never cached."""
+    laptops = list(iter_api_items("laptops/stream"))
+    brands = sorted({laptop['brand'] for laptop in laptops})
+    skus = [laptop['sku'] for laptop in laptops]
+    return brands, skus
+
+
+def get_laptops_snapshot():
+    version = get_catalog_version()
+    if version is None:
+        return [], []
+    try:
+        return _laptops_snapshot(version)
+    except (httpx.HTTPError, ijson.JSONError):
+        return [], []
+
+
+@st.cache_data(ttl=60)
+def get_laptop_details(sku):
+    """
+    Price history and reviews for an open card, so full-page reruns don't refetch
+    them. A failed fetch raises and is therefore not cached.
+    """
+    return fetch_many_api_data([
+        f"laptops/{sku}/price-history",
+        f"laptops/{sku}/reviews",
+    ])
+
+
+def _toggle_details(open_key):
+    st.session_state[open_key] = not st.session_state.get(open_key, False)
+
+
+@st.fragment
+def render_card(laptop):
+    """
+    Renders one catalog card. As a fragment, toggling its details reruns only
+    this card; details are fetched only while the card is open.
+    """
+    container = st.container(border=True)
+    container.subheader(laptop.header)
+    container.caption(f"SKU: {laptop.sku}")
+    container.markdown(laptop.rating_line)
+    container.markdown(laptop.availability_line)
+
+    open_key = f"open_{laptop.sku}"
+    is_open = st.session_state.get(open_key, False)
+    container.button("Hide Details" if is_open else "Show Details", key=f"details_{laptop.sku}",
+                     on_click=_toggle_details, args=(open_key,))
+
+    if is_open:
+
+        try:
+            price_history, reviews = get_laptop_details(laptop.sku)
+        except (httpx.HTTPError, orjson.JSONDecodeError):
+            price_history, reviews = None, None
+
+        container.subheader("Price History")
+        if price_history:
+            try:
+                # Row count, latest date and currency identify the data the figure shows.
+                fingerprint = (len(price_history), max(p['date'] for p in price_history),
+                               laptop.currency)
+                fig_key = f"fig_price_{laptop.sku}"
+                stored = st.session_state.get(fig_key)
+                if stored is not None and stored[0] == fingerprint:
+                    fig_price = stored[1]
+                else:
+                    price_df = pd.DataFrame(price_history)
+                    price_df['date'] = pd.to_datetime(price_df['date'])
+                    price_df = price_df.sort_values('date')
+                    if stored is None:
+                        fig_price = px.line(price_df, x='date', y='price', title="Price Trend", markers=True,
+                                            hover_data=['vendor_name', 'promo_badges'], render_mode='webgl')
+                        fig_price.update_layout(
+                            xaxis_title='Date', yaxis_title=f"Price ({laptop.currency})")
+                    else:
+                        # Refresh the existing trace rather than rebuilding the figure.
+                        fig_price = stored[1]
+                        with fig_price.batch_update():
+                            trace = fig_price.data[0]
+                            trace.x = price_df['date']
+                            trace.y = price_df['price']
+                            trace.customdata = price_df[['vendor_name', 'promo_badges']].to_numpy()
+                            fig_price.update_layout(yaxis_title=f"Price ({laptop.currency})")
+                    st.session_state[fig_key] = (fingerprint, fig_price)
+                container.plotly_chart(
+                    fig_price, use_container_width=True)
+            except Exception as e:
+                container.error(f"Error processing price data: {e}")
+                container.json(price_history)  # Show raw data on error
+        else:
+            container.write("No price history available or API error.")
+
+        container.subheader("Recent Reviews")
+        if reviews:
+            for review in reviews[:3]:
+                container.markdown(
+                    f"**Rating: {review['rating']}/5** ({review['date']}) - _{review.get('source', 'N/A')}_")
+                container.write(
+                    f"> {review.get('review_text', 'No text provided.')}")
+                container.divider()
+        else:
+            container.write("No reviews available or API error.")
+
+        pdf_url = PDF_MAP.get(laptop.sku)
+        if pdf_url:
+            container.markdown(
+                f"[View Full Spec Sheet (PDF)]({pdf_url})", unsafe_allow_html=True)
+
+
+@st.cache_data(ttl=300)
+def _build_review_figs(sku, payload_hash, _reviews):
+    """
+    Builds the three review charts and returns them as plain figure dicts, so
+    reruns skip the DataFrame work and plotly construction. Cached on the SKU and
+    a cheap fingerprint of the reviews; returns None if no review is usable.
+    """
+    reviews_df = _reviews.copy()
+    # Convert types safely
+    reviews_df['date'] = pd.to_datetime(
+        reviews_df['date'], errors='coerce')
+    reviews_df['rating'] = pd.to_numeric(
+        reviews_df['rating'], errors='coerce')
+    # Drop rows where conversion failed
+    reviews_df = reviews_df.dropna(subset=['date', 'rating'])
+    if reviews_df.empty:
+        return None
+
+    # "YYYY-MM" sorts chronologically, so an ordered categorical keeps month order.
+    reviews_df['year_month'] = pd.Categorical(
+        reviews_df['date'].dt.to_period('M').astype(str), ordered=True)
+    monthly = reviews_df.groupby('year_month', sort=True, observed=True).agg(
+        count=('rating', 'size'), average_rating=('rating', 'mean')).reset_index()
+    monthly['year_month'] = monthly['year_month'].astype(str)
+
+    fig_volume = None
+    volume_trend = monthly[['year_month', 'count']]
+    volume_title, volume_x_title = "Number of Reviews per Month", 'Month'
+    if len(volume_trend) > MAX_VOLUME_BARS:
+        # Too many bars for SVG; fall back to a coarser series.
+        volume_trend = reviews_df.groupby(reviews_df['date'].dt.to_period(
+            'Q').astype(str)).size().reset_index(name='count')
+        volume_trend.columns = ['year_month', 'count']
+        volume_title, volume_x_title = "Number of Reviews per Quarter", 'Quarter'
+    if not volume_trend.empty:
+        fig_volume = px.bar(
+            volume_trend, x='year_month', y='count', title=volume_title)
+        fig_volume.update_layout(
+            xaxis_title=volume_x_title, yaxis_title='Number of Reviews')
+        fig_volume = fig_volume.to_dict()
+
+    fig_rating_dist = None
+    rating_dist = reviews_df['rating'].value_counts(
+        sort=False).sort_index().rename_axis('rating').reset_index(name='count')
+    if not rating_dist.empty:
+        fig_rating_dist = px.bar(
+            rating_dist, x='rating', y='count', title="Distribution of Ratings")
+        fig_rating_dist.update_layout(
+            xaxis_title='Rating (Stars)', yaxis_title='Number of Reviews')
+        fig_rating_dist = fig_rating_dist.to_dict()
+
+    fig_avg_rating = None
+    avg_rating_trend = monthly[['year_month', 'average_rating']]
+    if len(avg_rating_trend) > 1:  # Need at least 2 points for a line chart
+        fig_avg_rating = px.line(
+            avg_rating_trend, x='year_month', y='average_rating', title="Average Rating per Month", markers=True,
+            render_mode='webgl')
+        fig_avg_rating.update_layout(
+            xaxis_title='Month', yaxis_title='Average Rating', yaxis=dict(range=[1, 5]))
+        fig_avg_rating = fig_avg_rating.to_dict()
+
+    return fig_volume, fig_rating_dist, fig_avg_rating
+
+
+def _session_figure(key, payload_hash, fig_dict):
+    """
+    Returns the Figure kept in session state under key. It is reused as is while
+    payload_hash is unchanged, and otherwise updated in place from fig_dict;
+    a new Figure is only built the first time or when the trace count changes.
+    """
+    stored = st.session_state.get(key)
+    if stored is not None and stored[0] == payload_hash:
+        return stored[1]
+
+    if stored is not None and len(stored[1].data) == len(fig_dict['data']):
+        fig = stored[1]
+        with fig.batch_update():
+            for trace, new_trace in zip(fig.data, fig_dict['data']):
+                trace.update(new_trace)
+            fig.update_layout(fig_dict['layout'])
+    else:
+        fig = go.Figure(fig_dict)
+    st.session_state[key] = (payload_hash, fig)
+    return fig
+
+
 st.set_page_config(page_title="Laptop Insights Engine", layout="wide")
 st.title("💻 Cross-Marketplace Laptop & Review Intelligence")
 
@@ -80,14 +426,7 @@ with tab_explore:
 
     st.sidebar.subheader("Filters")
 
-    @st.cache_data(ttl=300)
-    def get_brands():
-        laptop_list = fetch_api_data("laptops")
-        if laptop_list:
-            return sorted(list(set(laptop['brand'] for laptop in laptop_list)))
-        return []
-
-    available_brands = get_brands()
+    available_brands, _ = get_laptops_snapshot()
 
     selected_brand = st.sidebar.selectbox("Brand", ["All"] + available_brands)
     selected_min_rating = st.sidebar.slider(
@@ -105,7 +444,7 @@ with tab_explore:
     if selected_availability != "All":
         filter_params['availability'] = selected_availability
 
-    filtered_laptops_endpoint = f"laptops?{urlencode(filter_params)}"
+    filtered_laptops_endpoint = f"laptops/stream?{urlencode(filter_params)}"
     filtered_laptops = fetch_api_data(filtered_laptops_endpoint)
 
     if filtered_laptops is None:
@@ -115,81 +454,30 @@ with tab_explore:
     else:
         st.write(f"Found {len(filtered_laptops)} laptops matching criteria:")
 
+        # Card text is formatted column-wise once instead of per card.
+        laptops_df = pd.DataFrame(filtered_laptops)
+        laptops_df['header'] = laptops_df['brand'].fillna(
+            'N/A') + " " + laptops_df['model_name'].fillna('N/A')
+        # An all-null column comes back as object dtype, which can't be rounded.
+        ratings = pd.to_numeric(laptops_df['average_rating'], errors='coerce')
+        rating_str = (ratings.round(1).astype(str) + "/5.0").where(ratings.notna(), "N/A")
+        laptops_df['rating_line'] = "**Rating:** " + rating_str + " (" + laptops_df[
+            'review_count'].fillna(0).astype(int).astype(str) + " reviews)"
+        laptops_df['availability_line'] = "**Availability:** " + \
+            laptops_df['availability'].fillna('N/A')
+        laptops_df['currency'] = laptops_df['currency'].fillna('')
+
         cols = st.columns(st.sidebar.number_input(
             "Columns:", 1, 4, 2))
-        col_index = 0
-        for laptop in filtered_laptops:
-            container = cols[col_index % len(cols)].container(
-                border=True)
-            container.subheader(
-                f"{laptop.get('brand','N/A')} {laptop.get('model_name','N/A')}")
-            container.caption(f"SKU: {laptop.get('sku','N/A')}")
-            rating = laptop.get('average_rating')
-            rating_str = f"{rating:.1f}/5.0" if rating is not None else "N/A"
-            container.markdown(
-                f"**Rating:** {rating_str} ({laptop.get('review_count', 0)} reviews)")
-            container.markdown(
-                f"**Availability:** {laptop.get('availability', 'N/A')}")
-
-            if container.button("Show Details", key=f"details_{laptop['sku']}"):
-
-                container.subheader("Price History")
-                price_history = fetch_api_data(
-                    f"laptops/{laptop['sku']}/price-history")
-                if price_history:
-                    try:
-                        price_df = pd.DataFrame(price_history)
-                        price_df['date'] = pd.to_datetime(price_df['date'])
-                        price_df = price_df.sort_values('date')
-                        fig_price = px.line(price_df, x='date', y='price', title="Price Trend", markers=True,
-                                            hover_data=['vendor_name', 'promo_badges'])
-                        fig_price.update_layout(
-                            xaxis_title='Date', yaxis_title=f"Price ({laptop.get('currency', '')})")
-                        container.plotly_chart(
-                            fig_price, use_container_width=True)
-                    except Exception as e:
-                        container.error(f"Error processing price data: {e}")
-                        container.json(price_history)  # Show raw data on error
-                else:
-                    container.write("No price history available or API error.")
-
-                container.subheader("Recent Reviews")
-                reviews = fetch_api_data(f"laptops/{laptop['sku']}/reviews")
-                if reviews:
-                    for review in reviews[:3]:
-                        container.markdown(
-                            f"**Rating: {review['rating']}/5** ({review['date']}) - _{review.get('source', 'N/A')}_")
-                        container.write(
-                            f"> {review.get('review_text', 'No text provided.')}")
-                        container.divider()
-                else:
-                    container.write("No reviews available or API error.")
-
-                pdf_map = {
-                    "ThinkPad E14 Gen 5 (Intel)": "https://psref.lenovo.com/syspool/Sys/PDF/ThinkPad/ThinkPad_E14_Gen_5_Intel/ThinkPad_E14_Gen_5_Intel_Spec.PDF",
-                    "Lenovo ThinkPad E14 Gen 5 (AMD)": "https://psref.lenovo.com/syspool/Sys/PDF/ThinkPad/ThinkPad_E14_Gen_5_AMD/ThinkPad_E14_Gen_5_AMD_Spec.pdf",
-                    "HP ProBook 450 G10 — Datasheet": "https://h20195.www2.hp.com/v2/GetPDF.aspx/c08504822.pdf",
-                    "HP ProBook 440 14 inch G11 Notebook PC": "https://h20195.www2.hp.com/v2/getpdf.aspx/c08947328.pdf"
-                }
-                pdf_url = pdf_map.get(laptop['sku'])
-                if pdf_url:
-                    container.markdown(
-                        f"[View Full Spec Sheet (PDF)]({pdf_url})", unsafe_allow_html=True)
-
-            col_index += 1
+        for col_index, laptop in enumerate(laptops_df.itertuples(index=False)):
+            with cols[col_index % len(cols)]:
+                render_card(laptop)
 
 
 with tab_reviews:
     st.header("Reviews Intelligence")
 
-    @st.cache_data(ttl=300)
-    def get_sku_list():
-        laptop_list = fetch_api_data("laptops")
-        if laptop_list:
-            return [laptop['sku'] for laptop in laptop_list]
-        return []
-
-    skus = get_sku_list()
+    _, skus = get_laptops_snapshot()
 
     if not skus:
         st.warning("Laptop data not available to select SKU. Is the API running?")
@@ -202,75 +490,49 @@ with tab_reviews:
 
             @st.cache_data(ttl=60)
             def get_reviews_for_analysis(sku):
-                return fetch_api_data(f"laptops/{sku}/reviews")
+                return fetch_api_dataframe(f"laptops/{sku}/reviews")
 
-            reviews_data = get_reviews_for_analysis(selected_sku_reviews)
+            try:
+                reviews_data = get_reviews_for_analysis(selected_sku_reviews)
+            except (httpx.HTTPError, ijson.JSONError):
+                reviews_data = pd.DataFrame()
 
-            if reviews_data is None:
-                st.error("Failed to fetch review data from the API.")
-            elif not reviews_data:
-                st.warning("No reviews found for this SKU in the database.")
+            if reviews_data.empty:
+                st.warning("No reviews found for this SKU (or the API request failed).")
             else:
                 try:
-                    reviews_df = pd.DataFrame(reviews_data)
-                    # Convert types safely
-                    reviews_df['date'] = pd.to_datetime(
-                        reviews_df['date'], errors='coerce')
-                    reviews_df['rating'] = pd.to_numeric(
-                        reviews_df['rating'], errors='coerce')
-                    # Drop rows where conversion failed
-                    reviews_df = reviews_df.dropna(subset=['date', 'rating'])
-
-                    if reviews_df.empty:
+                    payload_hash = f"{len(reviews_data)}:{reviews_data['date'].max()}"
+                    figs = _build_review_figs(
+                        selected_sku_reviews, payload_hash, reviews_data)
+
+                    if figs is None:
                         st.warning(
                             "No valid review data found after processing.")
                     else:
-                        reviews_df['year_month'] = reviews_df['date'].dt.to_period(
-                            'M').astype(str)
+                        fig_volume, fig_rating_dist, fig_avg_rating = figs
 
                         st.markdown("#### Review Volume Over Time")
-                        volume_trend = reviews_df.groupby(
-                            'year_month').size().reset_index(name='count')
-                        volume_trend = volume_trend.sort_values('year_month')
-                        if not volume_trend.empty:
-                            fig_volume = px.bar(
-                                volume_trend, x='year_month', y='count', title="Number of Reviews per Month")
-                            fig_volume.update_layout(
-                                xaxis_title='Month', yaxis_title='Number of Reviews')
-                            st.plotly_chart(
-                                fig_volume, use_container_width=True)
+                        if fig_volume is not None:
+                            st.plotly_chart(_session_figure(
+                                f"fig_volume_{selected_sku_reviews}", payload_hash, fig_volume),
+                                use_container_width=True)
                         else:
                             st.write("Not enough data for volume trend.")
 
                         st.markdown("#### Rating Distribution")
-                        rating_dist = reviews_df['rating'].value_counts(
-                        ).reset_index(name='count')
-                        rating_dist.columns = ['rating', 'count']
-                        rating_dist = rating_dist.sort_values(
-                            'rating')  # Sort by rating
-                        if not rating_dist.empty:
-                            fig_rating_dist = px.bar(
-                                rating_dist, x='rating', y='count', title="Distribution of Ratings")
-                            fig_rating_dist.update_layout(
-                                xaxis_title='Rating (Stars)', yaxis_title='Number of Reviews')
-                            st.plotly_chart(fig_rating_dist,
-                                            use_container_width=True)
+                        if fig_rating_dist is not None:
+                            st.plotly_chart(_session_figure(
+                                f"fig_rating_dist_{selected_sku_reviews}", payload_hash, fig_rating_dist),
+                                use_container_width=True)
                         else:
                             st.write(
                                 "Not enough data for rating distribution.")
 
                         st.markdown("#### Average Rating Over Time")
-                        avg_rating_trend = reviews_df.groupby(
-                            'year_month')['rating'].mean().reset_index(name='average_rating')
-                        avg_rating_trend = avg_rating_trend.sort_values(
-                            'year_month')
-                        if len(avg_rating_trend) > 1:  # Need at least 2 points for a line chart
-                            fig_avg_rating = px.line(
-                                avg_rating_trend, x='year_month', y='average_rating', title="Average Rating per Month", markers=True)
-                            fig_avg_rating.update_layout(
-                                xaxis_title='Month', yaxis_title='Average Rating', yaxis=dict(range=[1, 5]))
-                            st.plotly_chart(
-                                fig_avg_rating, use_container_width=True)
+                        if fig_avg_rating is not None:
+                            st.plotly_chart(_session_figure(
+                                f"fig_avg_rating_{selected_sku_reviews}", payload_hash, fig_avg_rating),
+                                use_container_width=True)
                         else:
                             st.write(
                                 "Not enough data points for average rating trend.")
@@ -278,7 +540,12 @@ with tab_reviews:
                 except Exception as e:
                     st.error(f"Error processing review data for plots: {e}")
                     st.write("Raw Review Data:")
-                    st.json(reviews_data)  # Show raw data on error
+                    st.dataframe(reviews_data)  # Show raw data on error
+
+
+def _request_answer_refresh():
+    # The stale answer is only replaced once the refreshed one arrives.
+    st.session_state.refresh_pending = True
 
 
 with tab_chat:
@@ -288,37 +555,47 @@ with tab_chat:
 
         st.session_state.messages = []
 
-    for message in st.session_state.messages:
+    refresh = st.session_state.pop("refresh_pending", False)
+    # While refreshing, the stale answer is hidden but kept in case the request fails.
+    shown_messages = st.session_state.messages[:-1] if refresh else st.session_state.messages
+    for message in shown_messages:
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
 
-    if prompt := st.chat_input("Ask about specs, prices, or request recommendations..."):
+    if not refresh and st.session_state.messages and st.session_state.messages[-1]["role"] == "model":
+        st.button("🔄 Refresh last answer", on_click=_request_answer_refresh,
+                  help="Ask again without using a cached answer.")
 
+    prompt = st.chat_input("Ask about specs, prices, or request recommendations...")
+    if refresh:
+        prompt = st.session_state.messages[-2]["content"]
+    elif prompt:
         st.session_state.messages.append({"role": "user", "content": prompt})
         with st.chat_message("user"):
             st.markdown(prompt)
 
-        api_history = st.session_state.messages[:-1]
+    if prompt:
+
+        api_history = st.session_state.messages[:-2] if refresh else st.session_state.messages[:-1]
         api_history_formatted = [{"role": msg["role"], "content": msg["content"]}
                                  for msg in api_history[-5:]]  # Keep last 5
 
         with st.spinner("Thinking..."):
-            response_data = post_chat_query(prompt, api_history_formatted)
+            response_data = post_chat_query(
+                prompt, api_history_formatted, refresh=refresh)
 
         if response_data and "llm_answer" in response_data:
             model_response = response_data["llm_answer"]
 
-            import re
-            citations_found = re.findall(
-                r'\[(\d+(?:,\s*\d+)*)\]', model_response)
-            citations = set()
-            for group in citations_found:
-                nums = [int(n.strip()) for n in group.split(',')]
-                citations.update(nums)
-            citations_list = sorted(list(citations))
+            citations = {int(n) for m in _CITE_RE.finditer(model_response)
+                         for n in m.group(1).split(',')}
+            citations_list = sorted(citations)
 
             response_message = {"role": "model", "content": model_response}
-            st.session_state.messages.append(response_message)
+            if refresh:
+                st.session_state.messages[-1] = response_message
+            else:
+                st.session_state.messages.append(response_message)
             with st.chat_message("model"):
                 st.markdown(model_response)
 
@@ -327,6 +604,9 @@ with tab_chat:
                         f"Cited Sources: {', '.join(map(str, citations_list))}")
 
         else:
+            if refresh:
+                with st.chat_message("model"):
+                    st.markdown(st.session_state.messages[-1]["content"])
             # Display error if API call failed
             st.error(
                 "Failed to get response from the chatbot. Please check if the backend API is running and responding correctly.")
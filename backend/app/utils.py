@@ -1,161 +1,603 @@
 import os
+import asyncio
+import logging
 import faiss
 import json
 import sqlite3
-from contextlib import contextmanager
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager, nullcontext
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+import torch
+import cachetools
+import pyarrow as pa
+import aiosqlite
+from aiosqlitepool import SQLiteConnectionPool
 from sentence_transformers import SentenceTransformer
 import google.generativeai as genai
 from . import config
+from .embeddings import OnnxSentenceEncoder
+from .build_artifacts import build_ivfpq_index
 from fastapi import HTTPException
 
+logger = logging.getLogger(__name__)
+
 embedding_model_instance = None
 faiss_index_instance = None
 metadata_store_instance = None
 llm_model_instance = None
 artifacts_loaded = False
 
+# The index and its metadata, swapped as one tuple so a search never pairs
+# ids from one index build with rows from another.
+_retrieval_artifacts = (None, None)
+
+_db_pool = None
+
+_load_lock = threading.Lock()
+_artifacts_fingerprint = None
+
+# Bumped whenever the dynamic DB is written or artifacts are reloaded,
+# invalidating the caches keyed on it.
+data_epoch = 0
+
+_query_embedding_cache = OrderedDict()
+_search_result_cache = OrderedDict()
+_query_cache_lock = threading.Lock()
+
+# Per-SKU dynamic info for hot SKUs; cleared by bump_data_epoch, per SKU by invalidate_sku.
+_dyn_cache = cachetools.TTLCache(
+    maxsize=config.DYNAMIC_CACHE_MAX_ENTRIES, ttl=config.DYNAMIC_CACHE_TTL_SECONDS)
+_dyn_lock = threading.Lock()
+
+DB_PRAGMAS = (
+    "PRAGMA journal_mode=WAL;"
+    "PRAGMA synchronous=NORMAL;"
+    "PRAGMA cache_size=-65536;"
+    "PRAGMA mmap_size=268435456;"
+    "PRAGMA temp_store=MEMORY;"
+    # The API only reads the dynamic DB; index maintenance uses its own connection.
+    "PRAGMA query_only=ON;"
+)
+
+DB_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_price_sku_date ON PriceHistory(laptop_sku, date DESC);"
+    "CREATE INDEX IF NOT EXISTS idx_rv_sku_date ON Review(laptop_sku, date DESC);"
+    "CREATE INDEX IF NOT EXISTS idx_qa_sku_date ON QuestionAnswer(laptop_sku, date DESC);"
+    # Refresh planner statistics so the new indexes are actually chosen.
+    "ANALYZE;"
+)
+
+
+# The SKU list is bound as one JSON array, so the SQL text is identical for any
+# number of SKUs and each pooled connection prepares it only once.
+# The window only ranks the requested SKUs' price rows rather than the whole table.
+SQL_DYNAMIC_DATA = """
+    WITH wanted(sku) AS (SELECT value FROM json_each(?))
+    SELECT L.sku, L.currency, L.average_rating, L.review_count,
+           L.availability, L.shipping_eta,
+           P.price, P.vendor_name, P.promo_badges
+    FROM Laptop L
+    LEFT JOIN (
+        SELECT laptop_sku, price, vendor_name, promo_badges,
+               ROW_NUMBER() OVER (PARTITION BY laptop_sku ORDER BY date DESC) AS rn
+        FROM PriceHistory
+        WHERE laptop_sku IN wanted
+    ) P ON P.laptop_sku = L.sku AND P.rn = 1
+    WHERE L.sku IN wanted
+"""
+
+
+class ArrowMetadataStore:
+    """
+    Read-only, list-like view over the chunk metadata stored as an Arrow IPC file.
+    The file is memory-mapped without copying, and rows are materialized only when indexed.
+    """
+
+    def __init__(self, path: str):
+        self._table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+    def __len__(self):
+        return self._table.num_rows
+
+    def __getitem__(self, i: int) -> dict:
+        # No negative indexing: FAISS pads missing results with -1, which must
+        # not silently resolve to the last row.
+        if not 0 <= i < len(self):
+            raise IndexError(f"Metadata index {i} out of range")
+        return self._table.slice(i, 1).to_pylist()[0]
+
+
+def _artifact_fingerprint() -> tuple:
+    """Modification times of the on-disk index and metadata files (None if missing)."""
+    paths = (config.INDEX_PATH, config.IVFPQ_INDEX_PATH,
+             config.METADATA_ARROW_PATH, config.METADATA_PATH)
+    return tuple(os.path.getmtime(path) if os.path.exists(path) else None for path in paths)
+
 
 def load_all_artifacts():
-    """Loads all models and data required for the RAG system."""
-    global embedding_model_instance, faiss_index_instance, metadata_store_instance, llm_model_instance, artifacts_loaded
+    """
+    Loads all models and data required for the RAG system. Safe to call again
+    and from several threads: it only reloads when the index or metadata files
+    changed on disk since the last load. The API calls it at startup and then
+    periodically (see ARTIFACT_RELOAD_INTERVAL_SECONDS).
+    """
+    global _artifacts_fingerprint
 
-    if artifacts_loaded:
-        print("Artifacts already loaded.")
-        return True
+    with _load_lock:
+        fingerprint = _artifact_fingerprint()
+        if _artifacts_fingerprint is not None and fingerprint == _artifacts_fingerprint:
+            logger.debug("Artifact files unchanged; skipping reload.")
+            return artifacts_loaded
+
+        _load_artifacts()
+        # Taken after loading, since a load may write a converted index.
+        _artifacts_fingerprint = _artifact_fingerprint()
+        return artifacts_loaded
+
+
+def _load_artifacts():
+    global embedding_model_instance, faiss_index_instance, metadata_store_instance, llm_model_instance, artifacts_loaded
+    global _retrieval_artifacts
 
-    print("Loading all RAG artifacts...")
+    logger.info("Loading all RAG artifacts...")
     all_loaded = True
+    new_index = new_metadata = None
     try:
 
-        print(f"Loading embedding model: {config.EMBEDDING_MODEL_NAME}...")
-        embedding_model_instance = SentenceTransformer(
-            config.EMBEDDING_MODEL_NAME)
-        print(" > Embedding model loaded.")
+        # The encoder does not depend on the indexed data; keep it across reloads.
+        if embedding_model_instance is None:
+            if os.path.exists(config.ONNX_EMBEDDING_MODEL_PATH):
+                logger.info("Loading int8 ONNX embedding model from %s...",
+                            config.ONNX_EMBEDDING_MODEL_PATH)
+                embedding_model_instance = OnnxSentenceEncoder(
+                    config.ONNX_EMBEDDING_MODEL_PATH, config.EMBEDDING_TOKENIZER_NAME,
+                    max_seq_length=config.EMBEDDING_MAX_SEQ_LENGTH)
+            else:
+                logger.warning(
+                    "ONNX embedding model not found at %s "
+                    "(build it with `python -m app.build_artifacts onnx`). "
+                    "Falling back to SentenceTransformer: %s...",
+                    config.ONNX_EMBEDDING_MODEL_PATH, config.EMBEDDING_MODEL_NAME)
+                embedding_model_instance = load_sentence_transformer()
+            logger.info(" > Embedding model loaded.")
 
         if os.path.exists(config.INDEX_PATH):
-            print(f"Loading FAISS index from {config.INDEX_PATH}...")
-            faiss_index_instance = faiss.read_index(config.INDEX_PATH)
-            print(
-                f" > FAISS index loaded ({faiss_index_instance.ntotal} vectors).")
+            new_index = load_faiss_index()
+            configure_faiss_search(new_index)
+            logger.info(" > FAISS index loaded (%d vectors).", new_index.ntotal)
         else:
-            print(f"ERROR: FAISS index file not found at {config.INDEX_PATH}")
+            logger.error("FAISS index file not found at %s", config.INDEX_PATH)
             all_loaded = False
 
-        if os.path.exists(config.METADATA_PATH):
-            print(f"Loading metadata from {config.METADATA_PATH}...")
+        if os.path.exists(config.METADATA_ARROW_PATH):
+            logger.info("Loading metadata from %s...", config.METADATA_ARROW_PATH)
+            new_metadata = ArrowMetadataStore(config.METADATA_ARROW_PATH)
+            logger.info(" > Metadata loaded (%d entries, memory-mapped).", len(new_metadata))
+        elif os.path.exists(config.METADATA_PATH):
+            logger.info("Loading metadata from %s...", config.METADATA_PATH)
             with open(config.METADATA_PATH, 'r', encoding='utf-8') as f:
-                metadata_store_instance = json.load(f)
-            print(
-                f" > Metadata loaded ({len(metadata_store_instance)} entries).")
+                new_metadata = json.load(f)
+            logger.info(" > Metadata loaded (%d entries).", len(new_metadata))
         else:
-            print(f"ERROR: Metadata file not found at {config.METADATA_PATH}")
+            logger.error("Metadata file not found at %s", config.METADATA_PATH)
             all_loaded = False
 
+        # Swap only a complete pair, and drop the caches only once searches can
+        # no longer reach the old index, so they are not refilled with stale ids.
+        if new_index is not None and new_metadata is not None:
+            _retrieval_artifacts = (new_index, new_metadata)
+            faiss_index_instance, metadata_store_instance = _retrieval_artifacts
+            clear_query_caches()
+            bump_data_epoch()
+
         if config.GOOGLE_API_KEY:
-            print("Configuring Google Generative AI client...")
+            logger.info("Configuring Google Generative AI client...")
             try:
                 genai.configure(api_key=config.GOOGLE_API_KEY)
                 llm_model_instance = genai.GenerativeModel(
                     config.GEMINI_MODEL_NAME)
 
-                print(
-                    f" > Google client configured for model '{config.GEMINI_MODEL_NAME}'.")
+                logger.info(" > Google client configured for model '%s'.",
+                            config.GEMINI_MODEL_NAME)
             except Exception as e:
-                print(f"ERROR: Failed to configure Google client: {e}")
+                logger.error("Failed to configure Google client: %s", e)
                 all_loaded = False
         else:
-            print("ERROR: GOOGLE_API_KEY is missing. Cannot configure LLM.")
+            logger.error("GOOGLE_API_KEY is missing. Cannot configure LLM.")
             all_loaded = False
 
         if not os.path.exists(config.DB_PATH):
-            print(f"ERROR: SQLite DB file not found at {config.DB_PATH}")
+            logger.error("SQLite DB file not found at %s", config.DB_PATH)
             all_loaded = False
         else:
-            print(f" > SQLite DB file found at {config.DB_PATH}.")
+            logger.info(" > SQLite DB file found at %s.", config.DB_PATH)
+            ensure_db_indexes()
 
     except Exception as e:
-        print(f"FATAL ERROR during artifact loading: {e}")
+        logger.exception("FATAL ERROR during artifact loading: %s", e)
         all_loaded = False
 
     artifacts_loaded = all_loaded
     if artifacts_loaded:
-        print("\n All artifacts loaded successfully! ")
+        logger.info("All artifacts loaded successfully!")
     else:
-        print("\n  ❌ CRITICAL ERROR: Failed to load one or more artifacts. API may not function correctly.")
+        logger.critical(
+            "Failed to load one or more artifacts. API may not function correctly.")
 
     return artifacts_loaded
 
 
-@contextmanager
-def get_db_connection():
-    """Provides a managed database connection to the dynamic DB."""
-    conn = None
+def load_sentence_transformer() -> SentenceTransformer:
+    """Loads the PyTorch encoder, on the GPU in half precision when CUDA is available."""
+    torch.set_float32_matmul_precision('high')
+    device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    model = SentenceTransformer(config.EMBEDDING_MODEL_NAME, device=device)
+    if model.device.type == 'cuda':
+        model = model.half()
+    model.max_seq_length = config.EMBEDDING_MAX_SEQ_LENGTH
+    logger.info(" > SentenceTransformer on %s (%s).", model.device,
+                "float16" if model.device.type == 'cuda' else "float32")
+    return model
+
+
+def load_faiss_index():
+    """
+    Loads the FAISS index, preferring an IVF-PQ conversion that is at least as
+    new as the flat index. A flat index above FAISS_IVFPQ_MIN_VECTORS is
+    converted on the spot and the result persisted for the next start.
+    """
+    path = config.INDEX_PATH
+    if (os.path.exists(config.IVFPQ_INDEX_PATH) and
+            os.path.getmtime(config.IVFPQ_INDEX_PATH) >= os.path.getmtime(config.INDEX_PATH)):
+        path = config.IVFPQ_INDEX_PATH
+
+    logger.info("Loading FAISS index from %s...", path)
+    # Memory-mapped and read-only: pages load lazily and are shared across workers.
+    index = faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    if isinstance(index, faiss.IndexFlat) and index.ntotal > config.FAISS_IVFPQ_MIN_VECTORS:
+        nlist = int(np.sqrt(index.ntotal))
+        logger.info("Converting flat index (%d vectors) to IVF-PQ with nlist=%d...",
+                    index.ntotal, nlist)
+        # Vectors are re-added in order, so ids still line up with the metadata rows.
+        vectors = index.reconstruct_n(0, index.ntotal)
+        index = build_ivfpq_index(vectors, index.metric_type, nlist, config.FAISS_PQ_M)
+        try:
+            faiss.write_index(index, config.IVFPQ_INDEX_PATH)
+        except RuntimeError as e:
+            logger.warning("Could not persist IVF-PQ index: %s", e)
+    return index
+
+
+def configure_faiss_search(index):
+    """Applies query-time search parameters for the loaded index type."""
+    # Requests run one single-query search each; OpenMP fan-out only adds contention.
+    faiss.omp_set_num_threads(config.FAISS_OMP_THREADS)
+    if isinstance(index, faiss.IndexIVF):
+        index.nprobe = config.FAISS_NPROBE
+    elif isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = config.FAISS_HNSW_EF_SEARCH
+
+
+def _lru_get(cache: OrderedDict, key):
+    with _query_cache_lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+
+def _lru_put(cache: OrderedDict, key, value):
+    with _query_cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        if len(cache) > config.QUERY_CACHE_MAX_ENTRIES:
+            cache.popitem(last=False)
+
+
+def clear_query_caches():
+    """Drops memoized query embeddings and search results, e.g. after an artifact reload."""
+    with _query_cache_lock:
+        _query_embedding_cache.clear()
+        _search_result_cache.clear()
+
+
+def embed(texts: List[str]) -> np.ndarray:
+    """
+    Encodes texts into a contiguous (n, d) float32 array of unit vectors. The
+    PyTorch encoder runs in fixed-size batches under inference mode, with fp16
+    autocast on CUDA; the ONNX encoder batches and normalizes on its own.
+    """
+    if not isinstance(embedding_model_instance, SentenceTransformer):
+        return np.ascontiguousarray(embedding_model_instance.encode(texts), dtype=np.float32)
+
+    on_cuda = embedding_model_instance.device.type == 'cuda'
+    autocast = torch.autocast(device_type='cuda', dtype=torch.float16) if on_cuda else nullcontext()
+    with torch.inference_mode(), autocast:
+        vectors = embedding_model_instance.encode(
+            texts, batch_size=config.EMBED_ENCODE_BATCH_SIZE,
+            convert_to_numpy=True, normalize_embeddings=True)
+    return np.ascontiguousarray(vectors, dtype=np.float32)
+
+
+def embed_query(query: str) -> np.ndarray:
+    """Encodes a query into a (1, d) float32 vector, memoized on the raw query string."""
+    query_vector = _lru_get(_query_embedding_cache, query)
+    if query_vector is None:
+        query_vector = embed([query])
+        query_vector.setflags(write=False)
+        _lru_put(_query_embedding_cache, query, query_vector)
+    return query_vector
+
+
+class EmbedBatcher:
+    """
+    Coalesces concurrent query encodes into a single batched model call.
+    Requests arriving within `max_wait_ms` of each other (up to `max_batch_size`)
+    share one forward pass; results still go through the query embedding cache.
+    """
+
+    def __init__(self, max_batch_size: int, max_wait_ms: float):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = None
+        self._task = None
+
+    def start(self):
+        """Starts the background batching task on the running event loop."""
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stops the batching task, failing any request still waiting on it."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Embedding batcher stopped."))
+
+    async def embed(self, query: str) -> np.ndarray:
+        """Returns the (1, d) float32 embedding for a single query."""
+        query_vector = _lru_get(_query_embedding_cache, query)
+        if query_vector is not None:
+            return query_vector
+        if self._task is None:
+            return await asyncio.to_thread(embed_query, query)
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((query, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            if len(batch) < self.max_batch_size:
+                await asyncio.sleep(self.max_wait)
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            queries = list(dict.fromkeys(query for query, _ in batch))
+            try:
+                vectors = await asyncio.to_thread(embed, queries)
+            except Exception as e:
+                logger.error("Error during batched embedding of %d queries: %s",
+                             len(queries), e)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            vectors.setflags(write=False)
+            by_query = {query: vectors[i:i + 1] for i, query in enumerate(queries)}
+            for query, query_vector in by_query.items():
+                _lru_put(_query_embedding_cache, query, query_vector)
+            for query, future in batch:
+                if not future.done():
+                    future.set_result(by_query[query])
+
+
+embed_batcher = EmbedBatcher(
+    config.EMBED_BATCH_MAX_SIZE, config.EMBED_BATCH_MAX_WAIT_MS)
+
+
+def search_index(query: str, query_vector: np.ndarray,
+                 k: int) -> Tuple[np.ndarray, np.ndarray, Sequence[dict]]:
+    """
+    Runs the FAISS search for a query, memoized on (query, k). Returns the
+    distances and ids together with the metadata store those ids index into.
+    """
+    result = _lru_get(_search_result_cache, (query, k))
+    if result is None:
+        index, metadata = _retrieval_artifacts
+        distances, indices = index.search(query_vector, k)
+        distances.setflags(write=False)
+        indices.setflags(write=False)
+        result = (distances, indices, metadata)
+        # A search that raced an artifact swap must not repopulate the cleared cache.
+        if _retrieval_artifacts[0] is index:
+            _lru_put(_search_result_cache, (query, k), result)
+    return result
+
+
+def bump_data_epoch():
+    """
+    Marks the dynamic data as changed. Call after any write to the dynamic DB: it
+    clears the per-SKU dynamic cache, and the new epoch retires cached retrieval
+    results and cached answers that quote dynamic data.
+    """
+    global data_epoch
+    data_epoch += 1
+    with _dyn_lock:
+        _dyn_cache.clear()
+
+
+def db_version() -> str:
+    """
+    Cheap fingerprint of the dynamic DB: size and mtime of the database and its
+    WAL file plus data_epoch. Changes whenever the data may have changed.
+    """
+    parts = [str(data_epoch)]
+    for path in (config.DB_PATH, config.DB_PATH + "-wal"):
+        try:
+            stat = os.stat(path)
+            parts.append(f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+        except FileNotFoundError:
+            parts.append("0")
+    return ".".join(parts)
+
+
+def invalidate_sku(sku: str):
+    """
+    Call after writing one SKU's rows. Drops only that SKU's dynamic info, but
+    bumps data_epoch like bump_data_epoch, since cached retrieval results and
+    answers do not track which SKUs they quote.
+    """
+    global data_epoch
+    with _dyn_lock:
+        _dyn_cache.pop(sku, None)
+        data_epoch += 1
+
+
+def ensure_db_indexes():
+    """
+    Creates the (laptop_sku, date DESC) indexes the per-SKU queries rely on, if
+    missing, and refreshes the planner statistics. Laptop.sku is the primary key
+    and already has its own index.
+    """
+    try:
+        conn = sqlite3.connect(config.DB_PATH)
+        try:
+            conn.executescript(DB_INDEXES)
+        finally:
+            conn.close()
+        logger.info(" > SQLite indexes verified.")
+    except sqlite3.Error as e:
+        logger.warning("Could not create SQLite indexes: %s", e)
+
+
+async def _create_db_connection():
+    """Opens a dynamic DB connection configured once for reuse by the pool."""
+    conn = await aiosqlite.connect(
+        config.DB_PATH, isolation_level=None,
+        cached_statements=config.DB_CACHED_STATEMENTS)
+    conn.row_factory = sqlite3.Row
+    await conn.executescript(DB_PRAGMAS)
+    return conn
+
+
+def get_db_pool():
+    """Returns the shared async connection pool, creating it on first use."""
+    global _db_pool
+
+    if _db_pool is None:
+        _db_pool = SQLiteConnectionPool(
+            _create_db_connection, pool_size=config.DB_POOL_SIZE)
+        logger.info(" > SQLite connection pool ready (%d connections).",
+                    config.DB_POOL_SIZE)
+    return _db_pool
+
+
+async def close_db_pool():
+    """Closes every pooled connection. Called on application shutdown."""
+    global _db_pool
+
+    if _db_pool is not None:
+        await _db_pool.close()
+        _db_pool = None
+
+
+@asynccontextmanager
+async def get_db_connection():
+    """Provides a pooled database connection to the dynamic DB."""
     if not os.path.exists(config.DB_PATH):
-        print(f"ERROR: Database file not found at {config.DB_PATH}")
+        logger.error("Database file not found at %s", config.DB_PATH)
         raise FileNotFoundError(f"Database file not found at {config.DB_PATH}")
 
     try:
-        conn = sqlite3.connect(config.DB_PATH)
-        conn.row_factory = sqlite3.Row
-        yield conn
+        async with get_db_pool().connection() as conn:
+            yield conn
+    except HTTPException:
+        raise
     except sqlite3.Error as e:
-        print(f"Database connection error: {e}")
+        logger.error("Database connection error: %s", e)
 
         raise HTTPException(
             status_code=500, detail=f"Database connection error: {e}")
     except Exception as e:
-        print(f"Unexpected error getting DB connection: {e}")
+        logger.error("Unexpected error getting DB connection: %s", e)
         raise HTTPException(
             status_code=500, detail=f"Unexpected DB error: {e}")
-    finally:
-        if conn:
-            conn.close()
 
 
-def get_dynamic_data_for_sku(sku: str):
-    """Fetches latest price, rating, availability etc. for a given SKU from SQLite."""
-    dynamic_info = {"latest_price": "N/A", "avg_rating": "N/A",
-                    "availability": "N/A", "shipping_eta": "N/A", "vendor": "N/A"}
-    try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-
-            cursor.execute("""
-                SELECT price, date, vendor_name, promo_badges
-                FROM PriceHistory WHERE laptop_sku = ? ORDER BY date DESC LIMIT 1
-            """, (sku,))
-            latest_price_row = cursor.fetchone()
-
-            cursor.execute("""
-                SELECT currency, average_rating, review_count, availability, shipping_eta
-                FROM Laptop WHERE sku = ?
-            """, (sku,))
-            laptop_row = cursor.fetchone()
-
-            if laptop_row:
-                dynamic_info[
-                    "avg_rating"] = f"{laptop_row['average_rating']:.1f}/5.0 ({laptop_row['review_count']} reviews)"
-                dynamic_info["availability"] = laptop_row['availability']
-                dynamic_info["shipping_eta"] = laptop_row['shipping_eta']
-                currency = laptop_row['currency']
-            else:
-                print(
-                    f"Warning: Laptop details not found in DB for SKU: {sku}")
-                currency = "Unknown Currency"
-
-            if latest_price_row:
-                dynamic_info["latest_price"] = f"{currency} {latest_price_row['price']:.2f}"
-                if latest_price_row['promo_badges'] and latest_price_row['promo_badges'].lower() != "none":
-                    dynamic_info["latest_price"] += f" ({latest_price_row['promo_badges']})"
-                dynamic_info["vendor"] = latest_price_row['vendor_name'] if latest_price_row['vendor_name'] else "N/A"
-            else:
-                print(f"Warning: No price history found in DB for SKU: {sku}")
+def _empty_dynamic_info():
+    return {"latest_price": "N/A", "avg_rating": "N/A",
+            "availability": "N/A", "shipping_eta": "N/A", "vendor": "N/A"}
 
-    except sqlite3.Error as e:
 
-        print(f"SQLite error fetching dynamic data for SKU '{sku}': {e}")
+async def get_dynamic_data_for_skus(skus: List[str], refresh: bool = False) -> Dict[str, dict]:
+    """
+    Fetches latest price, rating, availability etc. for several SKUs from SQLite
+    in a single query. SKUs missing from the catalog map to "N/A" placeholders.
+    Results are memoized per SKU for a short TTL; only cache misses hit the DB.
+    With refresh, every SKU is re-read and the cache updated.
+    """
+    dynamic_data = {}
+    if not refresh:
+        with _dyn_lock:
+            for sku in skus:
+                cached = _dyn_cache.get(sku)
+                if cached is not None:
+                    dynamic_data[sku] = dict(cached)
+    misses = [sku for sku in dict.fromkeys(skus) if sku not in dynamic_data]
+    if not misses:
+        return dynamic_data
+
+    for sku in misses:
+        dynamic_data[sku] = _empty_dynamic_info()
+    try:
+        async with get_db_connection() as conn:
+            cursor = await conn.execute(SQL_DYNAMIC_DATA, (json.dumps(misses),))
+            rows = await cursor.fetchall()
+    except sqlite3.Error as e:
+        logger.error("SQLite error fetching dynamic data for SKUs %s: %s", skus, e)
+        return dynamic_data
     except Exception as e:
+        logger.error("Unexpected error fetching dynamic data for SKUs %s: %s", skus, e)
+        return dynamic_data
 
-        print(f"Unexpected error fetching dynamic data for SKU '{sku}': {e}")
+    for row in rows:
+        dynamic_info = dynamic_data[row['sku']]
+        dynamic_info[
+            "avg_rating"] = f"{row['average_rating']:.1f}/5.0 ({row['review_count']} reviews)"
+        dynamic_info["availability"] = row['availability']
+        dynamic_info["shipping_eta"] = row['shipping_eta']
 
-    return dynamic_info
+        if row['price'] is not None:
+            dynamic_info["latest_price"] = f"{row['currency']} {row['price']:.2f}"
+            if row['promo_badges'] and row['promo_badges'].lower() != "none":
+                dynamic_info["latest_price"] += f" ({row['promo_badges']})"
+            dynamic_info["vendor"] = row['vendor_name'] if row['vendor_name'] else "N/A"
+        else:
+            logger.warning("No price history found in DB for SKU: %s", row['sku'])
+
+    for sku in set(misses) - {row['sku'] for row in rows}:
+        logger.warning("Laptop details not found in DB for SKU: %s", sku)
+
+    with _dyn_lock:
+        for sku in misses:
+            _dyn_cache[sku] = dict(dynamic_data[sku])
+    return dynamic_data
+
+
+async def get_dynamic_data_for_sku(sku: str):
+    """Fetches latest price, rating, availability etc. for a given SKU from SQLite."""
+    return (await get_dynamic_data_for_skus([sku]))[sku]